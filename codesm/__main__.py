@@ -0,0 +1,29 @@
+"""Entry point for the codesm command"""
+
+import sys
+
+from codesm.cli_help import VERSION, help_text
+
+
+def main():
+    # Answer the read-only flags before importing Typer and building the app
+    argv = sys.argv[1:]
+    if argv in (["-V"], ["--version"]):
+        print(f"codesm {VERSION}")
+        return
+    if argv in ([], ["--help"]):
+        print(help_text())
+        return
+
+    # Plain one-shot chat skips building the Typer app; its --help stays with Typer
+    if argv[:1] == ["chat"] and not {"-h", "--help"} & set(argv):
+        from codesm.cli_common import chat_main
+        chat_main(argv[1:])
+        return
+
+    from codesm.cli import app
+    app()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,25 @@
 """Main agent - orchestrates LLM calls and tool execution"""
 
+import asyncio
 import logging
+import os
 from pathlib import Path
 from typing import AsyncIterator
 
 from codesm.provider.base import get_provider, StreamChunk
 from codesm.tool.registry import ToolRegistry
 from codesm.session.session import Session
-from codesm.agent.prompt import SYSTEM_PROMPT, build_system_prompt, format_available_skills
+from codesm.agent.prompt import SYSTEM_PROMPT_ENV, build_system_messages, format_available_skills
 from codesm.agent.loop import ReActLoop
-from codesm.mcp import MCPManager, load_mcp_config
+from codesm.mcp import MCPManager, find_mcp_config, load_mcp_config
 from codesm.skills import SkillManager
 from codesm.rules import RulesDiscovery
 
 logger = logging.getLogger(__name__)
 
+# Tool results saved to the session so they can be shown again on resume
+PERSISTED_TOOL_RESULTS = frozenset({"edit", "write", "bash", "grep", "glob", "todo"})
+
 
 class Agent:
     """AI coding agent that can read, write, and execute code"""
@@ -28,6 +33,10 @@ class Agent:
         mcp_config_path: Path | str | None = None,
     ):
         self.directory = Path(directory).resolve()
+        # The working directory never changes for an agent, so the base
+        # environment block is formatted once and stays byte-identical across
+        # turns (and cacheable by the provider)
+        self._system_env = SYSTEM_PROMPT_ENV.format(cwd=self.directory)
         self._model = model
         self.session = session or Session.create(self.directory)
         self.max_iterations = max_iterations
@@ -48,6 +57,22 @@ class Agent:
         
         # Rules discovery (AGENTS.md, CLAUDE.md, etc.)
         self.rules = RulesDiscovery(workspace=self.directory)
+        
+        # Background persistence of messages produced while streaming,
+        # started lazily on first use (needs a running loop)
+        self._persist_queue: asyncio.Queue | None = None
+        self._persist_task: asyncio.Task | None = None
+        
+        # Base context handed to tools; chat() gives each turn a shallow copy
+        # so per-turn keys (e.g. handoff markers) never leak into the next one.
+        # The session is added per turn since callers may swap agent.session.
+        self._tool_context = {
+            "cwd": self.directory,
+            "workspace_dir": str(self.directory),
+            "tools": self.tools,
+            "model": self._model,
+            "skills": self.skills,
+        }
 
     @property
     def model(self) -> str:
@@ -59,6 +84,7 @@ class Agent:
         """Set model and recreate provider"""
         self._model = value
         self.provider = get_provider(value)
+        self._tool_context["model"] = value
     
     async def _init_mcp(self):
         """Initialize MCP servers if configured"""
@@ -67,18 +93,12 @@ class Agent:
         
         self._mcp_initialized = True
         
+        if os.environ.get("CODESM_NO_MCP"):
+            logger.debug("MCP disabled via CODESM_NO_MCP")
+            return
+        
         # Load MCP config - search in working directory first
-        config_path = self._mcp_config_path
-        if not config_path:
-            # Try common locations relative to working directory
-            for candidate in [
-                self.directory / "mcp-servers.json",
-                self.directory / ".mcp" / "servers.json",
-                self.directory / "codesm.json",
-            ]:
-                if candidate.exists():
-                    config_path = candidate
-                    break
+        config_path = self._mcp_config_path or find_mcp_config(self.directory)
         
         servers = load_mcp_config(config_path)
         if not servers:
@@ -93,12 +113,44 @@ class Agent:
         logger.info(f"Connecting to {len(servers)} MCP servers...")
         results = await self._mcp_manager.connect_all()
         
-        connected = sum(1 for v in results.values() if v)
+        connected = sum(1 for r in results.values() if r.success)
         if connected > 0:
             # Register MCP manager with tool registry (includes code execution tools)
             self.tools.set_mcp_manager(self._mcp_manager, workspace_dir=self.directory)
             logger.info(f"Connected to {connected} MCP servers, {len(self._mcp_manager.get_tools())} MCP tools + code execution available")
     
+    def _persist_message(self, role: str, content: str | None = None, **kwargs):
+        """Queue a message for the current session without blocking the stream"""
+        if self._persist_queue is None:
+            self._persist_queue = asyncio.Queue()
+            self._persist_task = asyncio.create_task(self._persist_worker(self._persist_queue))
+        self._persist_queue.put_nowait((self.session, dict(role=role, content=content, **kwargs)))
+    
+    async def _persist_worker(self, queue: asyncio.Queue):
+        """Append queued messages and save each batch off the event loop"""
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            try:
+                sessions = {}
+                for session, msg in batch:
+                    session.add_message(persist=False, **msg)
+                    sessions[session.id] = session
+                for session in sessions.values():
+                    await session.save_async()
+            except Exception as e:
+                logger.warning(f"Failed to persist session messages: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _flush_persisted(self):
+        """Wait until all queued messages are appended and saved"""
+        if self._persist_queue is not None:
+            await self._persist_queue.join()
+    
     async def chat(self, message: str) -> AsyncIterator[str]:
         """Send a message and stream the response"""
         # Initialize MCP on first chat
@@ -109,7 +161,6 @@ class Agent:
         
         # Generate title asynchronously using Claude Haiku via OpenRouter
         # This runs in background and doesn't block the chat
-        import asyncio
         asyncio.create_task(self.session.generate_title_from_message(message))
         
         # Get conversation history
@@ -124,52 +175,51 @@ class Agent:
         skills_block = self.skills.render_active_for_prompt()
         available_skills_summary = format_available_skills(self.skills.list())
         custom_rules = self.rules.get_combined_rules()
-        system_prompt = build_system_prompt(
-            cwd=str(self.directory),
+        system_prompt = build_system_messages(
+            environment=self._system_env,
             skills_block=skills_block,
             available_skills_summary=available_skills_summary,
             custom_rules=custom_rules,
         )
         
         # Build context for tools
-        context = {
-            "session": self.session,
-            "session_id": self.session.id,
-            "cwd": self.directory,
-            "workspace_dir": str(self.directory),
-            "tools": self.tools,
-            "model": self._model,
-            "skills": self.skills,  # Add skills manager to context
-        }
+        context = dict(self._tool_context)
+        context["session"] = self.session
+        context["session_id"] = self.session.id
         
         # Run ReAct loop
-        full_response = ""
-        async for chunk in self.react_loop.execute(
-            provider=self.provider,
-            system_prompt=system_prompt,
-            messages=messages,
-            tools=self.tools,
-            context=context,
-        ):
-            if chunk.type == "text":
-                full_response += chunk.content
-                yield chunk
-            elif chunk.type == "tool_call":
-                yield chunk
-            elif chunk.type == "tool_result":
-                # Save tool results immediately for session recovery
-                if chunk.name in ["edit", "write", "bash", "grep", "glob", "todo"]:
-                    self.session.add_message(
-                        role="tool_display",
-                        content=chunk.content,
-                        tool_name=chunk.name,
-                        tool_call_id=chunk.id,
-                    )
-                yield chunk
-        
-        # Save final assistant response
-        if full_response:
-            self.session.add_message(role="assistant", content=full_response)
+        response_parts: list[str] = []
+        try:
+            async for chunk in self.react_loop.execute(
+                provider=self.provider,
+                system_prompt=system_prompt,
+                messages=messages,
+                tools=self.tools,
+                context=context,
+            ):
+                if chunk.type == "text":
+                    response_parts.append(chunk.content)
+                    yield chunk
+                elif chunk.type == "tool_call":
+                    yield chunk
+                elif chunk.type == "tool_result":
+                    # Save tool results immediately for session recovery
+                    if chunk.name in PERSISTED_TOOL_RESULTS:
+                        self._persist_message(
+                            role="tool_display",
+                            content=chunk.content,
+                            tool_name=chunk.name,
+                            tool_call_id=chunk.id,
+                        )
+                    yield chunk
+            
+            # Save final assistant response
+            full_response = "".join(response_parts)
+            if full_response:
+                self._persist_message(role="assistant", content=full_response)
+        finally:
+            # Also when the caller abandons the stream mid-turn
+            await self._flush_persisted()
     
     def new_session(self):
         """Start a new session"""
@@ -178,6 +228,12 @@ class Agent:
     
     async def cleanup(self):
         """Cleanup resources (disconnect MCP servers, etc.)"""
+        await self._flush_persisted()
+        if self._persist_task:
+            self._persist_task.cancel()
+            self._persist_task = None
+            self._persist_queue = None
+        
         if self._mcp_manager:
             await self._mcp_manager.disconnect_all()
             self._mcp_manager = None
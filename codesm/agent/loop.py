@@ -1,36 +1,130 @@
 """ReAct loop implementation for agent execution"""
 
+import asyncio
+import contextlib
 import logging
-from typing import AsyncIterator
+from typing import AsyncIterator, Callable
 from dataclasses import dataclass
-import json
 
 from codesm.provider.base import StreamChunk
 from codesm.tool.registry import ToolRegistry
 from codesm.session.context import ContextManager
 from codesm.session.summarize import summarize_messages
+from codesm.util import fastjson
 
 logger = logging.getLogger(__name__)
 
 
+def _normalize_args(args: dict | str) -> tuple[dict, str]:
+    """Return tool-call args as both a dict and a compact JSON string.
+    
+    Providers hand back either a parsed dict or the raw JSON text; whichever
+    form is given is reused as-is so large arguments are only (de)serialized once.
+    """
+    if isinstance(args, dict):
+        return args, fastjson.dumps(args)
+    if not args:
+        return {}, "{}"
+    try:
+        parsed = fastjson.loads(args)
+    except fastjson.JSONDecodeError:
+        return {}, args
+    return (parsed if isinstance(parsed, dict) else {}), args
+
+
+_STREAM_DONE = object()
+
+
+async def _read_ahead(
+    stream: AsyncIterator[StreamChunk],
+    maxsize: int = 32,
+    idle_timeout: Callable[[], float | None] | None = None,
+) -> AsyncIterator[StreamChunk | None]:
+    """Drain a provider stream from a background task through a bounded queue.
+    
+    The provider keeps reading from the network while the consumer is still
+    handling earlier chunks (e.g. the UI rendering them); once maxsize chunks
+    are buffered the provider waits. Provider errors are re-raised here.
+    
+    If idle_timeout returns a number, None is yielded when no chunk arrives
+    within that many seconds, so the consumer can act during a stall.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    
+    async def pump():
+        try:
+            async for chunk in stream:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_STREAM_DONE)
+        finally:
+            # Also when cancelled while blocked on a full queue: the provider
+            # generator is suspended then and would otherwise keep its HTTP
+            # stream open until it is garbage collected
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+    
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            timeout = idle_timeout() if idle_timeout else None
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield None
+                continue
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+
 @dataclass
 class ReActLoop:
     """Implements the ReAct (Reasoning + Acting) loop"""
     
     max_iterations: int = 0  # 0 = unlimited
+    # Consecutive text chunks are merged before being yielded, flushing once
+    # this many are pending or this many seconds passed since the last flush
+    text_flush_chunks: int = 16
+    text_flush_interval: float = 0.03
     
     async def execute(
         self,
         provider,
-        system_prompt: str,
+        system_prompt: str | list[dict],
         messages: list[dict],
         tools: ToolRegistry,
         context: dict,
     ) -> AsyncIterator[StreamChunk]:
-        """Execute the ReAct loop with tool calling"""
+        """Execute the ReAct loop with tool calling.
+        
+        Tool results are yielded through one reused StreamChunk, so consumers
+        must copy what they need before requesting the next chunk.
+        
+        The history sent to the provider is append-only within a turn (except
+        when compaction rewrites it), so every request extends the previous
+        one and server-side prompt caches keep hitting. It is copied at most
+        once per call, never per iteration.
+        """
         
         iteration = 0
-        current_messages = list(messages)  # Copy to avoid mutating original
+        clock = asyncio.get_running_loop().time
+        prev_fingerprint = None
+        result_chunk = StreamChunk(type="tool_result")
+        # Copy-on-write: the caller's list is used as-is until this turn needs
+        # to append to it, so text-only turns never copy the history. The
+        # caller must not mutate `messages` while the loop is running.
+        current_messages = messages
         session = context.get("session")
         
         # Get or create ContextManager for compaction
@@ -56,66 +150,119 @@ class ReActLoop:
                 logger.info(f"Compacted context from {tokens_before} to {tokens_after} tokens")
             
             # Get response from LLM
-            response_text = ""
+            response_parts: list[str] = []
             tool_calls = []
-            pending_tool_call = None
+            pending_by_id: dict[str, StreamChunk] = {}
+            pending_text: list[str] = []
+            last_flush = float("-inf")  # first token is never delayed
             
-            async for chunk in provider.stream(
+            def flush_due_in() -> float | None:
+                # Pending text waits at most text_flush_interval, even when
+                # the provider stalls (e.g. streaming a large tool argument)
+                if not pending_text:
+                    return None
+                return max(0.0, last_flush + self.text_flush_interval - clock())
+            
+            # Closed explicitly so an abandoned turn also closes the provider stream
+            async with contextlib.aclosing(_read_ahead(provider.stream(
                 system=system_prompt,
                 messages=current_messages,
-                tools=tools.get_schemas(),
-            ):
-                if chunk.type == "text":
-                    response_text += chunk.content
-                    yield chunk
-                elif chunk.type == "tool_call":
-                    tool_calls.append(chunk)
-                    yield chunk
-                elif chunk.type == "tool_call_delta":
-                    # Handle streaming tool call arguments
-                    if pending_tool_call is None:
-                        pending_tool_call = chunk
-                    else:
-                        # Accumulate args
-                        if chunk.args:
-                            pending_tool_call.args.update(chunk.args)
+                tools=tools.get_schemas(),  # cached by the registry between changes
+            ), idle_timeout=flush_due_in)) as chunks:
+                async for chunk in chunks:
+                    if chunk is None:
+                        yield StreamChunk(type="text", content="".join(pending_text))
+                        pending_text.clear()
+                        last_flush = clock()
+                        continue
+                    
+                    if chunk.type == "text":
+                        response_parts.append(chunk.content)
+                        pending_text.append(chunk.content)
+                        now = clock()
+                        if (
+                            len(pending_text) >= self.text_flush_chunks
+                            or now - last_flush >= self.text_flush_interval
+                        ):
+                            yield StreamChunk(type="text", content="".join(pending_text))
+                            pending_text.clear()
+                            last_flush = now
+                        continue
+                    
+                    if pending_text:
+                        yield StreamChunk(type="text", content="".join(pending_text))
+                        pending_text.clear()
+                        last_flush = clock()
+                    
+                    if chunk.type == "tool_call":
+                        tool_calls.append(chunk)
+                        yield chunk
+                    elif chunk.type == "tool_call_delta":
+                        # Handle streaming tool call arguments, accumulated per call id
+                        pending = pending_by_id.setdefault(chunk.id, chunk)
+                        if pending is not chunk and chunk.args:
+                            pending.args.update(chunk.args)
+            
+            if pending_text:
+                yield StreamChunk(type="text", content="".join(pending_text))
             
-            # Add any pending tool call
-            if pending_tool_call and pending_tool_call not in tool_calls:
-                tool_calls.append(pending_tool_call)
+            # Add any pending tool calls that never got a final tool_call chunk
+            if pending_by_id:
+                seen_ids = {tc.id for tc in tool_calls}
+                tool_calls.extend(
+                    tc for tc_id, tc in pending_by_id.items() if tc_id not in seen_ids
+                )
             
             # If no tool calls, we're done
             if not tool_calls:
                 break
             
+            # Normalize each call's args once: the dict is what the tool
+            # receives, the JSON string is what goes back into the history
+            normalized = [_normalize_args(tc.args) for tc in tool_calls]
+            
+            # A model that re-issues exactly the same tool calls it just got
+            # results for is stuck; stop instead of paying for another round-trip
+            fingerprint = tuple(sorted(
+                (tc.name, args_json) for tc, (_, args_json) in zip(tool_calls, normalized)
+            ))
+            if fingerprint == prev_fingerprint:
+                logger.warning("Detected repeated tool calls, stopping ReAct loop")
+                yield StreamChunk(
+                    type="text",
+                    content="\n\n[Detected repeated tool-call loop - stopping]",
+                )
+                return
+            prev_fingerprint = fingerprint
+            
             # Add assistant message with tool calls to history
-            assistant_msg = {"role": "assistant", "content": response_text or ""}
-            if tool_calls:
-                assistant_msg["tool_calls"] = [
+            response_text = "".join(response_parts)
+            assistant_msg = {
+                "role": "assistant",
+                "content": response_text,
+                "tool_calls": [
                     {
                         "id": tc.id,
                         "type": "function",
                         "function": {
                             "name": tc.name,
-                            "arguments": json.dumps(tc.args) if isinstance(tc.args, dict) else tc.args,
+                            "arguments": args_json,
                         }
                     }
-                    for tc in tool_calls
-                ]
+                    for tc, (_, args_json) in zip(tool_calls, normalized)
+                ],
+            }
+            if current_messages is messages:
+                current_messages = list(messages)
             current_messages.append(assistant_msg)
             
             # Execute tool calls in parallel (limit to avoid API errors)
             MAX_PARALLEL_CALLS = 64  # API limit is 128, stay well under
             
-            parsed_calls = []
-            for tool_call in tool_calls[:MAX_PARALLEL_CALLS]:  # Cap the number
-                args = tool_call.args
-                if isinstance(args, str):
-                    try:
-                        args = json.loads(args)
-                    except json.JSONDecodeError:
-                        args = {}
-                parsed_calls.append((tool_call.id, tool_call.name, args))
+            parsed_calls = [
+                (tc.id, tc.name, args)
+                for tc, (args, _) in zip(tool_calls[:MAX_PARALLEL_CALLS], normalized)  # Cap the number
+            ]
             
             if len(tool_calls) > MAX_PARALLEL_CALLS:
                 # Log that we're dropping some calls
@@ -140,7 +287,7 @@ class ReActLoop:
                 current_messages.append(tool_result_msg)
                 
                 # Yield tool result as a chunk
-                yield StreamChunk(
+                yield result_chunk.reset(
                     type="tool_result",
                     content=result,
                     id=call_id,
@@ -1,10 +1,10 @@
 """System prompts for the agent"""
 
-SYSTEM_PROMPT = """You are codesm, an expert AI coding agent. You help users with software engineering tasks by taking action, not just giving advice.
-
-# Environment
-- Working directory: {cwd}
-- You have access to powerful tools for reading, writing, searching, and executing code.
+# The system prompt is split into segments ordered from most to least
+# shareable so providers with prompt caching can reuse the longest prefix:
+# the invariant persona is identical for every project, the environment
+# block only changes per working directory.
+SYSTEM_PROMPT_INVARIANT = """You are codesm, an expert AI coding agent. You help users with software engineering tasks by taking action, not just giving advice.
 
 # Core Principles
 
@@ -94,6 +94,13 @@ CRITICAL: The todo tool is for YOUR tracking. After adding todos, keep working.
 - Never stop after adding todos - immediately start implementing
 """
 
+SYSTEM_PROMPT_ENV = """# Environment
+- Working directory: {cwd}
+- You have access to powerful tools for reading, writing, searching, and executing code.
+"""
+
+SYSTEM_PROMPT = SYSTEM_PROMPT_INVARIANT + "\n" + SYSTEM_PROMPT_ENV
+
 BUILD_AGENT_PROMPT = SYSTEM_PROMPT + """
 You have full access to modify files and run commands. Take action to complete the task.
 """
@@ -104,6 +111,60 @@ Analyze the codebase thoroughly using all available search tools and provide det
 """
 
 
+def _context_sections(
+    skills_block: str,
+    available_skills_summary: str,
+    custom_rules: str,
+) -> list[str]:
+    """Session-specific prompt sections, in the order they are injected"""
+    sections = []
+    
+    # Add custom rules from AGENTS.md etc (highest priority - comes first)
+    if custom_rules:
+        sections.append(f"# Project Rules\n\n{custom_rules}")
+    
+    # Add available skills summary if any
+    if available_skills_summary:
+        sections.append(available_skills_summary)
+    
+    # Add loaded skills content
+    if skills_block:
+        sections.append(skills_block)
+    
+    return sections
+
+
+def build_system_messages(
+    environment: str,
+    skills_block: str = "",
+    available_skills_summary: str = "",
+    custom_rules: str = "",
+) -> list[dict]:
+    """
+    Build the system prompt as content blocks with cache breakpoints.
+    
+    The invariant persona and the environment block each end with an
+    ephemeral cache breakpoint; session-specific rules and skills follow
+    in a final uncached block.
+    
+    Args:
+        environment: SYSTEM_PROMPT_ENV already formatted for the working directory
+        skills_block: Rendered content of loaded skills
+        available_skills_summary: Summary of available skills for the agent to know about
+        custom_rules: Custom rules from AGENTS.md / CLAUDE.md files
+    """
+    blocks = [
+        {"type": "text", "text": SYSTEM_PROMPT_INVARIANT, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": environment, "cache_control": {"type": "ephemeral"}},
+    ]
+    
+    sections = _context_sections(skills_block, available_skills_summary, custom_rules)
+    if sections:
+        blocks.append({"type": "text", "text": "\n\n".join(sections)})
+    
+    return blocks
+
+
 def build_system_prompt(
     cwd: str,
     skills_block: str = "",
@@ -111,7 +172,8 @@ def build_system_prompt(
     custom_rules: str = "",
 ) -> str:
     """
-    Build the full system prompt with skills and rules injected.
+    Build the full system prompt as one string, for providers without
+    content blocks. Same text as build_system_messages().
     
     Args:
         cwd: Current working directory
@@ -119,21 +181,23 @@ def build_system_prompt(
         available_skills_summary: Summary of available skills for the agent to know about
         custom_rules: Custom rules from AGENTS.md / CLAUDE.md files
     """
-    prompt = SYSTEM_PROMPT.format(cwd=cwd)
-    
-    # Add custom rules from AGENTS.md etc (highest priority - comes first)
-    if custom_rules:
-        prompt += f"\n\n# Project Rules\n\n{custom_rules}"
-    
-    # Add available skills summary if any
-    if available_skills_summary:
-        prompt += f"\n\n{available_skills_summary}"
-    
-    # Add loaded skills content
-    if skills_block:
-        prompt += f"\n\n{skills_block}"
-    
-    return prompt
+    invariant, environment, *context = build_system_messages(
+        SYSTEM_PROMPT_ENV.format(cwd=cwd),
+        skills_block=skills_block,
+        available_skills_summary=available_skills_summary,
+        custom_rules=custom_rules,
+    )
+    return "\n\n".join([invariant["text"] + "\n" + environment["text"]] + [b["text"] for b in context])
+
+
+_SKILLS_HEADER = """# Available Skills
+
+The following skills provide specialized instructions for specific tasks.
+Use the skill tool to load a skill when the task matches its description.
+
+Loaded skills appear as `<loaded_skill name="...">` in the conversation.
+
+<available_skills>"""
 
 
 def format_available_skills(skills_list: list) -> str:
@@ -141,24 +205,13 @@ def format_available_skills(skills_list: list) -> str:
     if not skills_list:
         return ""
     
-    lines = [
-        "# Available Skills",
-        "",
-        "The following skills provide specialized instructions for specific tasks.",
-        "Use the skill tool to load a skill when the task matches its description.",
-        "",
-        "Loaded skills appear as `<loaded_skill name=\"...\">` in the conversation.",
-        "",
-        "<available_skills>",
-    ]
-    
-    for skill in skills_list:
-        lines.append("  <skill>")
-        lines.append(f"    <name>{skill.name}</name>")
-        lines.append(f"    <description>{skill.description or 'No description'}</description>")
-        lines.append(f"    <triggers>{', '.join(skill.triggers) if skill.triggers else 'manual'}</triggers>")
-        lines.append("  </skill>")
-    
-    lines.append("</available_skills>")
+    body = "\n".join(
+        "  <skill>\n"
+        f"    <name>{skill.name}</name>\n"
+        f"    <description>{skill.description or 'No description'}</description>\n"
+        f"    <triggers>{', '.join(skill.triggers) if skill.triggers else 'manual'}</triggers>\n"
+        "  </skill>"
+        for skill in skills_list
+    )
     
-    return "\n".join(lines)
+    return f"{_SKILLS_HEADER}\n{body}\n</available_skills>"
@@ -385,7 +385,7 @@ class SubAgent:
         system = self.config.system_prompt + f"\n\n# Environment\nWorking directory: {self.directory}"
         
         # Run the ReAct loop and collect response
-        full_response = ""
+        response_parts: list[str] = []
         tool_summaries = []
         
         async for chunk in self.react_loop.execute(
@@ -396,13 +396,13 @@ class SubAgent:
             context=context,
         ):
             if chunk.type == "text":
-                full_response += chunk.content
+                response_parts.append(chunk.content)
             elif chunk.type == "tool_result":
                 # Collect tool execution summaries
                 tool_summaries.append(f"✓ {chunk.name}")
         
         # Build result with metadata
-        result = full_response
+        result = "".join(response_parts)
         
         if tool_summaries:
             result += f"\n\n---\n_Tools used: {', '.join(tool_summaries)}_"
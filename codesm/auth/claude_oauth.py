@@ -1,10 +1,85 @@
 """Claude Pro/Max OAuth authentication"""
 
+import asyncio
+import importlib.util
 import httpx
+import math
 import time
 from typing import Optional
+from codesm import __version__
 from .credentials import CredentialStore
 
+# HTTP/2 needs the optional h2 package (httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Shared connection pool for all auth requests, so token exchange, API key
+# creation and later refreshes reuse warm connections instead of paying a
+# TCP+TLS handshake each time. Bound to the event loop that created it.
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+# Serialises OAuth token refreshes across every ClaudeOAuth instance (the main
+# agent and each subagent own one), so tasks that notice an expired token at
+# the same time trigger a single refresh. Bound to its event loop like _client.
+_refresh_lock: asyncio.Lock | None = None
+_refresh_lock_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the shared auth HTTP client for the running event loop"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            timeout=httpx.Timeout(30.0),
+            http2=_HTTP2_AVAILABLE,
+            headers={"User-Agent": f"codesm/{__version__}"},
+        )
+        _client_loop = loop
+    return _client
+
+
+def _get_refresh_lock() -> asyncio.Lock:
+    """Get the token refresh lock for the running event loop"""
+    global _refresh_lock, _refresh_lock_loop
+    loop = asyncio.get_running_loop()
+    if _refresh_lock is None or _refresh_lock_loop is not loop:
+        _refresh_lock = asyncio.Lock()
+        _refresh_lock_loop = loop
+    return _refresh_lock
+
+
+def _parse_error(resp: httpx.Response) -> str:
+    """Extract a short error message from a failed auth response"""
+    content_type = resp.headers.get("content-type", "")
+    if content_type.startswith("text/html"):
+        return f"Server returned HTML (status {resp.status_code}). This may be a Cloudflare challenge - try again later."
+    if not content_type.startswith("application/json"):
+        return resp.text[:200] or f"HTTP {resp.status_code}"
+
+    body = resp.json()
+    if not isinstance(body, dict):
+        return str(body)[:200]
+    error = body.get("error")
+    if isinstance(error, dict):
+        # API errors look like {"error": {"type": ..., "message": ...}}
+        error = error.get("message")
+    message = body.get("error_description") or error or body.get("message") or str(body)
+    return str(message)[:200]
+
+
+async def aclose_client():
+    """Close the shared auth HTTP client, if one is open on this loop"""
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+_UNSYNCED = object()
+
 
 class ClaudeOAuth:
     """Handle Claude Pro/Max OAuth flow"""
@@ -16,6 +91,39 @@ class ClaudeOAuth:
 
     def __init__(self):
         self.credential_store = CredentialStore()
+        # Auth fields mirrored from the stored credentials. The store hands out
+        # the same dict until the file changes, so an identity check is enough
+        # to notice logins/refreshes made by other instances or processes.
+        self._creds_src: object = _UNSYNCED
+        self._auth_type: Optional[str] = None
+        self._token: Optional[str] = None
+        self._expires_at_ns: float = 0
+
+    def _sync(self):
+        """Refresh the mirrored auth fields if the stored credentials changed"""
+        creds = self.credential_store.get("anthropic")
+        if creds is self._creds_src:
+            return
+        self._creds_src = creds
+        creds = creds or {}
+        self._auth_type = creds.get("auth_type")
+        if self._auth_type == "api_key":
+            self._token = creds.get("api_key")
+            self._expires_at_ns = math.inf
+        elif self._auth_type == "oauth":
+            self._token = creds.get("access_token")
+            expires_at_ns = creds.get("expires_at_ns")
+            if expires_at_ns is None:
+                # Legacy millisecond field written by older versions
+                expires_at_ns = creds.get("expires_at", 0) * 1_000_000
+            self._expires_at_ns = expires_at_ns
+        else:
+            self._token = None
+            self._expires_at_ns = 0
+
+    async def aclose(self):
+        """Close the shared HTTP connection pool used for auth requests"""
+        await aclose_client()
 
     async def exchange_code(self, code: str, code_verifier: str, state: str, create_api_key: bool = True) -> dict:
         """Exchange authorization code for access token.
@@ -30,61 +138,51 @@ class ClaudeOAuth:
             actual_code = code
             actual_state = state
 
-        async with httpx.AsyncClient() as client:
-            # Send as JSON (not form-urlencoded) - this is what opencode does
-            json_data = {
-                "grant_type": "authorization_code",
-                "code": actual_code,
-                "state": actual_state,
-                "redirect_uri": self.REDIRECT_URI,
-                "client_id": self.CLIENT_ID,
-                "code_verifier": code_verifier,
-            }
-
-            try:
-                response = await client.post(
-                    self.TOKEN_URL,
-                    json=json_data,
-                    headers={"Content-Type": "application/json"},
-                )
-                if response.status_code != 200:
-                    error_text = response.text
-                    # Check if response is HTML (e.g., Cloudflare challenge page)
-                    if error_text.strip().startswith("<!DOCTYPE") or "<html" in error_text[:100]:
-                        return {"success": False, "error": f"Server returned HTML (status {response.status_code}). This may be a Cloudflare challenge - try again later."}
-                    # Try to parse JSON error
-                    try:
-                        error_json = response.json()
-                        error_msg = error_json.get("error_description") or error_json.get("error") or error_json.get("message") or str(error_json)
-                        return {"success": False, "error": error_msg[:200]}
-                    except Exception:
-                        # Truncate raw text error
-                        return {"success": False, "error": error_text[:200]}
-                
-                token_data = response.json()
-                access_token = token_data.get("access_token")
-                
-                if create_api_key and access_token:
-                    # Create an API key using the OAuth token
-                    # This works for third-party apps since it creates a real API key
-                    api_key_result = await self._create_api_key(client, access_token)
-                    if api_key_result["success"]:
-                        self.save_api_key(api_key_result["api_key"])
-                        return {"success": True, "data": {"api_key": api_key_result["api_key"]}}
-                    else:
-                        return api_key_result
+        client = _get_client()
+        
+        # Send as JSON (not form-urlencoded) - this is what opencode does
+        json_data = {
+            "grant_type": "authorization_code",
+            "code": actual_code,
+            "state": actual_state,
+            "redirect_uri": self.REDIRECT_URI,
+            "client_id": self.CLIENT_ID,
+            "code_verifier": code_verifier,
+        }
+
+        try:
+            response = await client.post(
+                self.TOKEN_URL,
+                json=json_data,
+                headers={"Content-Type": "application/json"},
+            )
+            if response.status_code != 200:
+                return {"success": False, "error": _parse_error(response)}
+
+            token_data = response.json()
+            access_token = token_data.get("access_token")
+
+            if create_api_key and access_token:
+                # Create an API key using the OAuth token
+                # This works for third-party apps since it creates a real API key
+                api_key_result = await self._create_api_key(access_token)
+                if api_key_result["success"]:
+                    self.save_api_key(api_key_result["api_key"])
+                    return {"success": True, "data": {"api_key": api_key_result["api_key"]}}
                 else:
-                    # Save OAuth credentials directly (only works for whitelisted apps)
-                    self._save_credentials(token_data)
-                    return {"success": True, "data": token_data}
-                    
-            except Exception as e:
-                return {"success": False, "error": str(e)[:200]}
-
-    async def _create_api_key(self, client: httpx.AsyncClient, access_token: str) -> dict:
+                    return api_key_result
+            else:
+                # Save OAuth credentials directly (only works for whitelisted apps)
+                self._save_credentials(token_data)
+                return {"success": True, "data": token_data}
+
+        except Exception as e:
+            return {"success": False, "error": str(e)[:200]}
+
+    async def _create_api_key(self, access_token: str) -> dict:
         """Create an API key using OAuth access token."""
         try:
-            response = await client.post(
+            response = await _get_client().post(
                 "https://api.anthropic.com/api/oauth/claude_cli/create_api_key",
                 headers={
                     "Content-Type": "application/json",
@@ -97,44 +195,33 @@ class ClaudeOAuth:
                 if api_key:
                     return {"success": True, "api_key": api_key}
                 return {"success": False, "error": "No API key in response"}
-            else:
-                try:
-                    error_json = response.json()
-                    error_msg = error_json.get("error", {}).get("message") or str(error_json)
-                    return {"success": False, "error": f"Failed to create API key: {error_msg[:150]}"}
-                except:
-                    return {"success": False, "error": f"Failed to create API key: {response.status_code}"}
+            return {"success": False, "error": f"Failed to create API key: {_parse_error(response)[:150]}"}
         except Exception as e:
             return {"success": False, "error": f"Error creating API key: {str(e)[:150]}"}
 
     async def refresh_token(self, refresh_token: str) -> dict:
         """Refresh an expired access token."""
-        async with httpx.AsyncClient() as client:
-            json_data = {
-                "grant_type": "refresh_token",
-                "refresh_token": refresh_token,
-                "client_id": self.CLIENT_ID,
-            }
-
-            try:
-                response = await client.post(
-                    self.TOKEN_URL,
-                    json=json_data,
-                    headers={"Content-Type": "application/json"},
-                )
-                if response.status_code == 200:
-                    token_data = response.json()
-                    self._save_credentials(token_data)
-                    return {"success": True, "data": token_data}
-                else:
-                    try:
-                        error_json = response.json()
-                        error_msg = error_json.get("error_description") or error_json.get("error") or str(error_json)
-                        return {"success": False, "error": error_msg[:200]}
-                    except Exception:
-                        return {"success": False, "error": response.text[:200]}
-            except Exception as e:
-                return {"success": False, "error": str(e)[:200]}
+        client = _get_client()
+        
+        json_data = {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": self.CLIENT_ID,
+        }
+
+        try:
+            response = await client.post(
+                self.TOKEN_URL,
+                json=json_data,
+                headers={"Content-Type": "application/json"},
+            )
+            if response.status_code == 200:
+                token_data = response.json()
+                self._save_credentials(token_data)
+                return {"success": True, "data": token_data}
+            return {"success": False, "error": _parse_error(response)}
+        except Exception as e:
+            return {"success": False, "error": str(e)[:200]}
 
     def _save_credentials(self, token_data: dict):
         """Save OAuth credentials"""
@@ -143,7 +230,7 @@ class ClaudeOAuth:
             "auth_type": "oauth",
             "access_token": token_data.get("access_token"),
             "refresh_token": token_data.get("refresh_token"),
-            "expires_at": int(time.time() * 1000) + (expires_in * 1000),
+            "expires_at_ns": time.time_ns() + expires_in * 1_000_000_000,
         })
 
     def save_api_key(self, api_key: str):
@@ -163,18 +250,33 @@ class ClaudeOAuth:
 
     def get_api_key(self) -> Optional[str]:
         """Get API key or access token for API calls"""
-        creds = self.get_credentials()
-        if creds:
-            if creds.get("auth_type") == "api_key":
-                return creds.get("api_key")
-            elif creds.get("auth_type") == "oauth":
-                return creds.get("access_token")
-        return None
+        self._sync()
+        return self._token
+
+    async def get_valid_access_token(self) -> Optional[str]:
+        """Get the API key or a current OAuth access token, refreshing if expired.
+        
+        Concurrent callers share a single refresh: whoever takes the lock first
+        refreshes, the rest re-check and reuse the new token.
+        Raises ValueError if the token cannot be refreshed.
+        """
+        if not self.is_token_expired():
+            return self._token
+        
+        async with _get_refresh_lock():
+            if not self.is_token_expired():
+                # Another task refreshed while we waited
+                return self._token
+            
+            refresh_token = self.get_credentials().get("refresh_token")
+            if not refresh_token:
+                raise ValueError("OAuth token expired and no refresh token available")
+            result = await self.refresh_token(refresh_token)
+            if not result["success"]:
+                raise ValueError(f"Failed to refresh OAuth token: {result.get('error')}")
+            return self.get_api_key()
 
     def is_token_expired(self) -> bool:
-        """Check if the OAuth token is expired"""
-        creds = self.get_credentials()
-        if not creds or creds.get("auth_type") != "oauth":
-            return True
-        expires_at = creds.get("expires_at", 0)
-        return int(time.time() * 1000) >= expires_at
+        """Check if the OAuth token is expired (API keys never expire)"""
+        self._sync()
+        return self._auth_type == "oauth" and time.time_ns() >= self._expires_at_ns
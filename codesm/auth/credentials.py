@@ -1,13 +1,19 @@
 """Credential storage for providers"""
 
-import json
 from pathlib import Path
 from typing import Optional
 
+from codesm.util import fastjson
+
 
 class CredentialStore:
     """Simple file-based credential storage"""
 
+    # Parsed credential files shared by all instances, keyed by path and
+    # invalidated when the file's mtime/size change (e.g. another process
+    # logged in). Maps path -> ((mtime_ns, size), data).
+    _cache: dict[Path, tuple[tuple[int, int], dict]] = {}
+
     def __init__(self):
         self.config_dir = Path.home() / ".config" / "codesm"
         self.credentials_file = self.config_dir / "credentials.json"
@@ -17,16 +23,30 @@ class CredentialStore:
         self.config_dir.mkdir(parents=True, exist_ok=True)
 
     def _load(self) -> dict:
-        if self.credentials_file.exists():
-            try:
-                return json.loads(self.credentials_file.read_text())
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
+        """Load all credentials; the returned dict is shared and must not be mutated"""
+        try:
+            st = self.credentials_file.stat()
+        except OSError:
+            self._cache.pop(self.credentials_file, None)
+            return {}
+        
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(self.credentials_file)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        try:
+            data = fastjson.loads(self.credentials_file.read_bytes())
+        except (fastjson.JSONDecodeError, IOError):
+            return {}
+        self._cache[self.credentials_file] = (stamp, data)
+        return data
 
     def _save(self, data: dict):
-        self.credentials_file.write_text(json.dumps(data, indent=2))
+        self.credentials_file.write_bytes(fastjson.dumpb(data, indent=True))
         self.credentials_file.chmod(0o600)
+        st = self.credentials_file.stat()
+        self._cache[self.credentials_file] = ((st.st_mtime_ns, st.st_size), data)
 
     def get(self, provider: str) -> Optional[dict]:
         """Get credentials for a provider"""
@@ -35,13 +55,13 @@ class CredentialStore:
 
     def set(self, provider: str, credentials: dict):
         """Set credentials for a provider"""
-        data = self._load()
+        data = dict(self._load())
         data[provider] = credentials
         self._save(data)
 
     def delete(self, provider: str):
         """Delete credentials for a provider"""
-        data = self._load()
+        data = dict(self._load())
         if provider in data:
             del data[provider]
             self._save(data)
@@ -65,9 +85,8 @@ class CredentialStore:
 
     def set_preferred_model(self, model: str):
         """Set the user's preferred model"""
-        data = self._load()
-        if "_preferences" not in data:
-            data["_preferences"] = {}
+        data = dict(self._load())
+        data["_preferences"] = dict(data.get("_preferences", {}))
         data["_preferences"]["model"] = model
         self._save(data)
 
@@ -78,9 +97,8 @@ class CredentialStore:
 
     def set_preferred_theme(self, theme: str):
         """Set the user's preferred theme"""
-        data = self._load()
-        if "_preferences" not in data:
-            data["_preferences"] = {}
+        data = dict(self._load())
+        data["_preferences"] = dict(data.get("_preferences", {}))
         data["_preferences"]["theme"] = theme
         self._save(data)
 
@@ -91,8 +109,7 @@ class CredentialStore:
 
     def set_preferred_mode(self, mode: str):
         """Set the user's preferred mode (smart/rush)"""
-        data = self._load()
-        if "_preferences" not in data:
-            data["_preferences"] = {}
+        data = dict(self._load())
+        data["_preferences"] = dict(data.get("_preferences", {}))
         data["_preferences"]["mode"] = mode
         self._save(data)
@@ -1,144 +1,58 @@
 """CLI entry point for codesm"""
 
 import typer
-import logging
+import importlib
+import os
 import sys
 from pathlib import Path
+from typer.core import TyperGroup
 
-# Configure logging
-logging.basicConfig(
-    level=logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("codesm.log"),
-        logging.StreamHandler(),
-    ]
-)
-
-VERSION = "0.1.0"
-
-HELP_TEXT = """Codesm CLI
-
-Usage: codesm [options] [command]
-
-Commands:
-
-  run          Start the codesm agent (interactive TUI)
-  chat         Send a single message (non-interactive)
-  serve        Start HTTP API server
-  init         Initialize project with AGENTS.md
-  mcp          Manage MCP servers
-    list       List all configured MCP servers
-    test       Test connection to MCP servers
-    init       Create an example MCP configuration file
-
-Options:
-
-  --help
-      Show this message and exit.
-  -V, --version
-      Print the version number and exit.
-
-Environment variables:
-
-  ANTHROPIC_API_KEY      API key for Anthropic Claude models
-  OPENAI_API_KEY         API key for OpenAI models  
-  CODESM_MODEL           Default model to use (e.g., anthropic/claude-sonnet-4-20250514)
-  CODESM_LOG_LEVEL       Set log level (error, warn, info, debug)
-  CODESM_CONFIG          Path to config file (default: ~/.config/codesm/config.json)
-
-Examples:
-
-Start an interactive session:
-
-  $ codesm run
-
-Start an interactive session in a specific directory:
-
-  $ codesm run /path/to/project
-
-Send a single message (non-interactive):
-
-  $ codesm chat "explain this codebase"
-
-Send a message with a specific model:
-
-  $ codesm chat "fix the bug" --model anthropic/claude-sonnet-4-20250514
-
-Initialize project with AGENTS.md:
-
-  $ codesm init
-
-  This scans your project and generates an AGENTS.md file with detected:
-  - Language and frameworks
-  - Build, test, and lint commands  
-  - Code style guidelines
-
-Start the HTTP API server:
-
-  $ codesm serve --port 4096
-
-List configured MCP servers:
-
-  $ codesm mcp list
-
-Test MCP server connections:
-
-  $ codesm mcp test
-
-Configuration:
-
-Codesm can be configured using files in the following locations:
+from codesm.cli_common import default_model, init_logging, run_chat
+from codesm.cli_help import VERSION, help_text
 
-  Project config:
-    ./mcp-servers.json          MCP server definitions
-    ./.codesm/mcp.json          Alternative MCP config location
-    ./AGENTS.md                 Project-specific agent instructions
-
-  User config:
-    ~/.config/codesm/config.json    User preferences
-    ~/.config/codesm/mcp.json       User MCP servers
-    ~/.config/codesm/AGENTS.md      Global agent instructions
+def version_callback(value: bool):
+    if value:
+        print(f"codesm {VERSION}")
+        # Exit straight away rather than via click's Exit handling
+        sys.stdout.flush()
+        sys.exit(0)
 
-AGENTS.md:
 
-  Codesm automatically loads AGENTS.md files to customize agent behavior.
-  Supported files (in priority order):
-    - AGENTS.md
-    - AGENT.md
-    - CLAUDE.md
-    - CONTEXT.md
-    - .cursorrules
-    - .github/copilot-instructions.md
+def help_callback(ctx: typer.Context, value: bool):
+    if value:
+        print(help_text())
+        sys.stdout.flush()
+        sys.exit(0)
 
-  Run 'codesm init' to generate an AGENTS.md for your project.
 
-Memory commands:
+# Subcommand groups imported only when invoked: name -> "module:attribute"
+LAZY_SUBCOMMANDS = {
+    "memory": "codesm.memory.cli:memory_app",
+    "index": "codesm.index.cli:index_app",
+    "threads": "codesm.cli_threads:app",
+    "tools": "codesm.cli_tools:app",
+    "permissions": "codesm.cli_permissions:app",
+    "mcp": "codesm.cli_mcp:app",
+}
 
-  codesm memory list       List stored memories
-  codesm memory add        Add a memory manually  
-  codesm memory forget     Delete a specific memory
-  codesm memory clear      Clear stored memories
 
-Index commands:
+class LazyGroup(TyperGroup):
+    """Root command group that imports subcommand apps on first use.
 
-  codesm index build       Build codebase index for fast semantic search
-  codesm index status      Show index status
-  codesm index search      Search the indexed codebase
-  codesm index clear       Clear the index
-"""
+    ``codesm run`` or ``codesm --help`` never pull in the memory, index,
+    MCP or session stacks; ``codesm memory ...`` imports only memory.
+    """
 
+    def list_commands(self, ctx):
+        commands = super().list_commands(ctx)
+        return commands + [name for name in LAZY_SUBCOMMANDS if name not in commands]
 
-def version_callback(value: bool):
-    if value:
-        print(f"codesm {VERSION}")
-        raise typer.Exit()
-
-
-def help_callback(ctx: typer.Context, value: bool):
-    if value:
-        print(HELP_TEXT)
-        raise typer.Exit()
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in LAZY_SUBCOMMANDS and cmd_name not in self.commands:
+            module_name, attr = LAZY_SUBCOMMANDS[cmd_name].split(":")
+            sub_app = getattr(importlib.import_module(module_name), attr)
+            self.add_command(typer.main.get_command(sub_app), cmd_name)
+        return super().get_command(ctx, cmd_name)
 
 
 app = typer.Typer(
@@ -146,14 +60,9 @@ app = typer.Typer(
     help="AI coding agent",
     add_completion=False,
     invoke_without_command=True,
+    cls=LazyGroup,
 )
 
-# Add memory and index subcommands
-from codesm.memory.cli import memory_app
-from codesm.index.cli import index_app
-app.add_typer(memory_app, name="memory")
-app.add_typer(index_app, name="index")
-
 
 @app.command()
 def login(
@@ -194,13 +103,6 @@ def logout(
         print(f"Credentials removed for {provider}")
 
 
-# Import subcommands
-from codesm.cli_threads import app as threads_app
-from codesm.cli_tools import app as tools_app
-
-app.add_typer(threads_app, name="threads")
-app.add_typer(tools_app, name="tools")
-
 @app.callback()
 def main_callback(
     ctx: typer.Context,
@@ -225,15 +127,17 @@ def main_callback(
     ),
 ):
     """AI coding agent"""
+    if execute or ctx.invoked_subcommand is not None:
+        init_logging()
+
     if execute:
         # Non-interactive execution mode
         import asyncio
         from codesm.agent.agent import Agent
-        from codesm.auth.credentials import CredentialStore
+        from codesm.auth.claude_oauth import aclose_client
         
         async def run_execute():
-            store = CredentialStore()
-            model = store.get_preferred_model() or "anthropic/claude-sonnet-4-20250514"
+            model = default_model()
             
             # Initialize agent
             agent = Agent(directory=Path("."), model=model)
@@ -248,12 +152,13 @@ def main_callback(
             print(full_response)
             
             await agent.cleanup()
+            await aclose_client()
             
         asyncio.run(run_execute())
         raise typer.Exit()
 
     if ctx.invoked_subcommand is None:
-        print(HELP_TEXT)
+        print(help_text())
         raise typer.Exit()
 
 
@@ -276,12 +181,9 @@ def run(
 ):
     """Start the codesm agent"""
     from codesm.tui.app import CodesmApp
-    from codesm.auth.credentials import CredentialStore
 
     # Use preferred model from config if no model specified
-    if model is None:
-        store = CredentialStore()
-        model = store.get_preferred_model() or "anthropic/claude-sonnet-4-20250514"
+    model = model or default_model()
 
     app = CodesmApp(directory=directory, model=model, session_id=session)
     app.run()
@@ -294,30 +196,8 @@ def chat(
     model: str = typer.Option(None, "--model", "-m"),
 ):
     """Send a single message (non-interactive)"""
-    import asyncio
-    from codesm.agent.agent import Agent
-    from codesm.auth.credentials import CredentialStore
-
     # Use preferred model from config if no model specified
-    if model is None:
-        store = CredentialStore()
-        model = store.get_preferred_model() or "anthropic/claude-sonnet-4-20250514"
-
-    async def run_chat():
-        agent = Agent(directory=directory, model=model)
-        # Initialize MCP explicitly if needed, but agent.chat() does it
-        try:
-            async for chunk in agent.chat(message):
-                # chunk is a StreamChunk object, extract the content
-                if hasattr(chunk, 'content'):
-                    print(chunk.content, end="", flush=True)
-                else:
-                    print(chunk, end="", flush=True)
-            print()
-        finally:
-            await agent.cleanup()
-
-    asyncio.run(run_chat())
+    run_chat(message, directory, model or default_model())
 
 
 @app.command()
@@ -336,23 +216,6 @@ def lsp():
     from codesm.lsp.server import start_lsp
     start_lsp()
 
-# Register subcommands
-try:
-    from codesm.cli_threads import app as threads_app
-    app.add_typer(threads_app, name="threads", help="Manage sessions")
-    
-    from codesm.cli_tools import app as tools_app
-    app.add_typer(tools_app, name="tools", help="Explore tools")
-    
-    from codesm.cli_permissions import app as perms_app
-    app.add_typer(perms_app, name="permissions", help="Manage permissions")
-
-    from codesm.cli_mcp import app as mcp_app
-    app.add_typer(mcp_app, name="mcp", help="Manage MCP servers")
-except ImportError as e:
-    pass
-
-
 @app.command()
 def init(
     directory: Path = typer.Argument(
@@ -371,7 +234,6 @@ def init(
     ),
 ):
     """Initialize project with AGENTS.md"""
-    import os
     from codesm.rules.init import init_agents_md, save_agents_md
     from rich.console import Console
 
@@ -403,8 +265,12 @@ def init(
     console.print("[dim]Edit AGENTS.md to customize agent behavior for your project.[/dim]")
     
     if edit:
+        import shlex
+        import subprocess
+
         editor = os.environ.get("EDITOR", "vim")
-        os.system(f"{editor} {agents_path}")
+        # No shell: EDITOR may carry flags (e.g. "code -w"), the path is passed verbatim
+        subprocess.run([*shlex.split(editor), str(agents_path)], check=False)
 
 
 
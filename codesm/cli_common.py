@@ -0,0 +1,98 @@
+"""CLI helpers shared by the Typer app and the pre-Typer fast paths
+
+Nothing here imports Typer, so ``codesm chat`` can run without building the
+full command tree.
+"""
+
+import functools
+import os
+import sys
+from pathlib import Path
+
+_logging_configured = False
+
+
+def init_logging():
+    """Attach codesm's log handlers once, when a real command runs.
+
+    Invoked from the app callback and the chat fast path rather than at
+    import, so ``--help``, ``--version`` and shell completion never open a
+    log file, and importing this module twice does not stack duplicate
+    handlers.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+
+    import logging
+
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    handlers = [logging.StreamHandler()]
+    log_file = os.environ.get("CODESM_LOG_FILE")
+    if log_file:
+        # delay=True: the file is only created once something is logged
+        handlers.append(logging.FileHandler(log_file, delay=True))
+
+    level_name = os.environ.get("CODESM_LOG_LEVEL", "warning").upper()
+    logger = logging.getLogger("codesm")
+    logger.setLevel(logging.getLevelNamesMapping().get(level_name, logging.WARNING))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+
+@functools.lru_cache(maxsize=1)
+def default_model() -> str:
+    """The user's preferred model, read from the credential store once per process"""
+    from codesm.auth.credentials import CredentialStore
+
+    return CredentialStore().get_preferred_model() or "anthropic/claude-sonnet-4-20250514"
+
+
+def run_chat(message: str, directory: Path, model: str):
+    """Send one message to the agent and stream the reply to stdout"""
+    import asyncio
+    from codesm.agent.agent import Agent
+    from codesm.auth.claude_oauth import aclose_client
+
+    async def run():
+        agent = Agent(directory=directory, model=model)
+        # Batch streamed text into larger writes instead of flushing per token
+        out = sys.stdout
+        pending: list[str] = []
+        pending_len = 0
+        # Initialize MCP explicitly if needed, but agent.chat() does it
+        try:
+            async for chunk in agent.chat(message):
+                # chunk is a StreamChunk object, extract the content
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                pending.append(text)
+                pending_len += len(text)
+                if pending_len >= 256 or "\n" in text:
+                    out.write("".join(pending))
+                    out.flush()
+                    pending.clear()
+                    pending_len = 0
+            pending.append("\n")
+        finally:
+            out.write("".join(pending))
+            out.flush()
+            await agent.cleanup()
+            await aclose_client()
+
+    asyncio.run(run())
+
+
+def chat_main(argv: list[str]):
+    """``codesm chat`` parsed with argparse, for the entry point's fast path"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="codesm chat", description="Send a single message (non-interactive)")
+    parser.add_argument("message", help="Message to send")
+    parser.add_argument("--dir", "-d", dest="directory", type=Path, default=Path("."))
+    parser.add_argument("--model", "-m", default=None)
+    args = parser.parse_args(argv)
+
+    init_logging()
+    run_chat(args.message, args.directory, args.model or default_model())
@@ -0,0 +1,10 @@
+"""Static CLI text, importable without Typer so --help/--version stay cheap"""
+
+VERSION = "0.1.0"
+
+
+def help_text() -> str:
+    """The full --help text, read from package data only when it is shown"""
+    from importlib.resources import files
+
+    return files("codesm").joinpath("cli_help.txt").read_text(encoding="utf-8")
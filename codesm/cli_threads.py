@@ -1,17 +1,18 @@
 """CLI commands for session management"""
 
 import typer
-from rich.console import Console
-from rich.table import Table
 from pathlib import Path
-from codesm.session.session import Session
 
 app = typer.Typer(help="Manage sessions/threads")
-console = Console()
 
 @app.command("list")
 def list_sessions():
     """List all saved sessions"""
+    from codesm.session.session import Session
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
     sessions = Session.list_sessions()
     
     if not sessions:
@@ -44,6 +45,10 @@ def new_session(
     directory: Path = typer.Option(Path("."), "--dir", "-d", help="Working directory for the session")
 ):
     """Create a new session"""
+    from codesm.session.session import Session
+    from rich.console import Console
+
+    console = Console()
     session = Session.create(directory)
     console.print(f"[green]Created new session:[/green] {session.id}")
     console.print(f"Run 'codesm threads continue {session.id}' to start")
@@ -54,17 +59,18 @@ def continue_session(
 ):
     """Resume an existing session"""
     from codesm.tui.app import CodesmApp
-    from codesm.auth.credentials import CredentialStore
+    from codesm.cli_common import default_model
+    from codesm.session.session import Session
+    from rich.console import Console
+
+    console = Console()
     
     session = Session.load(session_id)
     if not session:
         console.print(f"[red]Session not found: {session_id}[/red]")
         raise typer.Exit(1)
         
-    store = CredentialStore()
-    model = store.get_preferred_model() or "anthropic/claude-sonnet-4-20250514"
-    
-    app = CodesmApp(directory=session.directory, model=model, session_id=session_id)
+    app = CodesmApp(directory=session.directory, model=default_model(), session_id=session_id)
     app.run()
 
 @app.command("export")
@@ -74,6 +80,11 @@ def export_session(
     output: Path = typer.Option(None, "--output", "-o", help="Output file path (default: stdout)"),
 ):
     """Export a session to Markdown or JSON"""
+    import json
+    from codesm.session.session import Session
+    from rich.console import Console
+
+    console = Console()
     session = Session.load(session_id)
     if not session:
         console.print(f"[red]Session not found: {session_id}[/red]")
@@ -82,7 +93,6 @@ def export_session(
     result = ""
     
     if format.lower() == "json":
-        import json
         # Filter out internal keys starting with _
         clean_messages = []
         for msg in session.messages:
@@ -125,6 +135,11 @@ def share_session(
     port: int = typer.Option(4096, "--port", "-p", help="Server port"),
 ):
     """Share a session via local URL"""
+    import webbrowser
+    from codesm.session.session import Session
+    from rich.console import Console
+
+    console = Console()
     session = Session.load(session_id)
     if not session:
         console.print(f"[red]Session not found: {session_id}[/red]")
@@ -134,7 +149,6 @@ def share_session(
     console.print(f"[green]Session available at:[/green] {url}")
     console.print("[dim]Ensure the server is running with 'codesm serve'[/dim]")
     
-    import webbrowser
     if typer.confirm("Open in browser?"):
         webbrowser.open(url)
 
@@ -145,6 +159,10 @@ def rename_session(
     name: str = typer.Argument(..., help="New name for the session")
 ):
     """Rename a session"""
+    from codesm.session.session import Session
+    from rich.console import Console
+
+    console = Console()
     session = Session.load(session_id)
     if not session:
         console.print(f"[red]Session not found: {session_id}[/red]")
@@ -159,6 +177,10 @@ def delete_session(
     force: bool = typer.Option(False, "--force", "-f", help="Delete without confirmation")
 ):
     """Delete a session"""
+    from codesm.session.session import Session
+    from rich.console import Console
+
+    console = Console()
     if not force:
         if not typer.confirm(f"Are you sure you want to delete session {session_id}?"):
             raise typer.Abort()
@@ -1,39 +1,28 @@
 """CLI commands for tool management"""
 
 import typer
-import json
-import asyncio
-from rich.console import Console
-from rich.table import Table
-from rich.syntax import Syntax
 from pathlib import Path
-from codesm.tool.registry import ToolRegistry
-from codesm.mcp.manager import MCPManager
-from codesm.mcp import load_mcp_config
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from codesm.tool.registry import ToolRegistry
 
 app = typer.Typer(help="Discover and execute tools")
-console = Console()
 
-def get_registry(directory: Path = Path(".")) -> ToolRegistry:
+def get_registry(directory: Path = Path(".")) -> "ToolRegistry":
     """Initialize tool registry with MCP if configured"""
+    from codesm.tool.registry import ToolRegistry
+    from codesm.mcp import find_mcp_config, load_mcp_config
+
     registry = ToolRegistry()
     
-    # Try to load MCP config
-    config_path = directory / "mcp-servers.json"
-    if not config_path.exists():
-        # Try other locations
-        for candidate in [
-            directory / ".mcp" / "servers.json",
-            directory / "codesm.json",
-            Path.home() / ".config" / "codesm" / "mcp.json"
-        ]:
-            if candidate.exists():
-                config_path = candidate
-                break
-                
-    servers = load_mcp_config(config_path) if config_path.exists() else {}
+    config_path = find_mcp_config(directory, user_fallback=True)
+    servers = load_mcp_config(config_path) if config_path else {}
     
     if servers:
+        import asyncio
+        from codesm.mcp.manager import MCPManager
+
         async def connect_mcp():
             manager = MCPManager()
             for name, config in servers.items():
@@ -51,6 +40,10 @@ def list_tools(
     directory: Path = typer.Option(Path("."), "--dir", "-d", help="Working directory context")
 ):
     """List available tools"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
     registry = get_registry(directory)
     schemas = registry.get_schemas()
     
@@ -70,6 +63,10 @@ def show_tool(
     directory: Path = typer.Option(Path("."), "--dir", "-d", help="Working directory context")
 ):
     """Show tool details and schema"""
+    from rich.console import Console
+    from rich.syntax import Syntax
+
+    console = Console()
     registry = get_registry(directory)
     tool = registry.get(name)
     
@@ -93,6 +90,11 @@ def use_tool(
     directory: Path = typer.Option(Path("."), "--dir", "-d", help="Working directory context")
 ):
     """Execute a tool directly"""
+    import asyncio
+    import json
+    from rich.console import Console
+
+    console = Console()
     registry = get_registry(directory)
     tool = registry.get(name)
     
@@ -110,9 +112,10 @@ def use_tool(
         return
         
     # Context needed for some tools
+    resolved = directory.resolve()
     context = {
-        "cwd": directory.resolve(),
-        "workspace_dir": str(directory.resolve())
+        "cwd": resolved,
+        "workspace_dir": str(resolved)
     }
     
     async def run_tool():
@@ -1,16 +1,30 @@
 """Configuration schemas using Pydantic"""
 
-from pydantic import BaseModel, Field
+import functools
+from pydantic import BaseModel, ConfigDict, Field
 from pathlib import Path
 from typing import Any, Literal
 
+from codesm.util import fastjson
+
+
+@functools.lru_cache(maxsize=8)
+def _find_config_path(cwd: Path) -> Path | None:
+    """First existing config file for a working directory (cached per process)"""
+    candidates = [
+        cwd / "codesm.json",
+        Path.home() / ".config" / "codesm" / "config.json",
+    ]
+    return next((p for p in candidates if p.exists()), None)
+
 
 class ProviderConfig(BaseModel):
     """LLM provider configuration"""
-    name: Literal["anthropic", "openai"]
+    name: Literal["anthropic", "openai"] | None = None
     api_key: str | None = None
     base_url: str | None = None
     timeout: int = 120
+    options: dict[str, Any] = Field(default_factory=dict)
 
 
 class ModelConfig(BaseModel):
@@ -21,6 +35,15 @@ class ModelConfig(BaseModel):
     max_tokens: int = 8192
 
 
+class AgentConfig(BaseModel):
+    """Custom agent definition"""
+    name: str
+    model: str | None = None
+    prompt: str | None = None
+    tools: dict[str, bool] = Field(default_factory=dict)
+    permissions: dict[str, str] = Field(default_factory=dict)
+
+
 class ToolConfig(BaseModel):
     """Tool configuration"""
     enabled: list[str] = Field(default_factory=lambda: [
@@ -85,12 +108,44 @@ class SafetyConfig(BaseModel):
 
 class Config(BaseModel):
     """Main configuration"""
-    model: ModelConfig = Field(default_factory=ModelConfig)
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: str = "anthropic/claude-sonnet-4-20250514"
+    providers: dict[str, ProviderConfig] = Field(default_factory=dict)
+    agents: dict[str, AgentConfig] = Field(default_factory=dict)
     tools: ToolConfig = Field(default_factory=ToolConfig)
     session: SessionConfig = Field(default_factory=SessionConfig)
     mcp: MCPConfig = Field(default_factory=MCPConfig)
     safety: SafetyConfig = Field(default_factory=SafetyConfig)
-    working_directory: Path = Field(default_factory=Path.cwd)
-
-    class Config:
-        arbitrary_types_allowed = True
+    # Runtime only; never written to the config file
+    working_directory: Path = Field(default_factory=Path.cwd, exclude=True)
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "Config":
+        """Load config from file"""
+        if path is None:
+            # Look for codesm.json in current dir or home
+            path = _find_config_path(Path.cwd())
+        elif not path.exists():
+            path = None
+        
+        if path:
+            try:
+                raw = path.read_bytes()
+            except FileNotFoundError:
+                # Removed since the location was cached
+                return cls()
+            # Parse and validate in one compiled pass, no intermediate dict
+            return cls.model_validate_json(raw)
+        
+        return cls()
+    
+    @staticmethod
+    def invalidate_path_cache():
+        """Forget resolved config locations (e.g. after creating a config file)"""
+        _find_config_path.cache_clear()
+    
+    def save(self, path: Path):
+        """Save config to file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(fastjson.dumpb(self.model_dump(mode="json"), indent=True))
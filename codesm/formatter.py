@@ -2,7 +2,7 @@
 
 import asyncio
 import logging
-import shutil
+import os
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
@@ -78,40 +78,88 @@ EXTENSION_FORMATTERS: dict[str, list[FormatterType]] = {
 FORMATTER_COMMANDS: dict[FormatterType, dict] = {
     FormatterType.BLACK: {
         "cmd": ["black", "--quiet", "{file}"],
-        "check_cmd": ["black", "--version"],
     },
     FormatterType.RUFF: {
         "cmd": ["ruff", "format", "{file}"],
-        "check_cmd": ["ruff", "--version"],
     },
     FormatterType.PRETTIER: {
         "cmd": ["prettier", "--write", "{file}"],
-        "check_cmd": ["prettier", "--version"],
     },
     FormatterType.GOFMT: {
         "cmd": ["gofmt", "-w", "{file}"],
-        "check_cmd": ["gofmt", "-h"],  # gofmt doesn't have --version
     },
     FormatterType.RUSTFMT: {
         "cmd": ["rustfmt", "{file}"],
-        "check_cmd": ["rustfmt", "--version"],
     },
     FormatterType.CLANG_FORMAT: {
         "cmd": ["clang-format", "-i", "{file}"],
-        "check_cmd": ["clang-format", "--version"],
     },
     FormatterType.SHFMT: {
         "cmd": ["shfmt", "-w", "{file}"],
-        "check_cmd": ["shfmt", "--version"],
     },
 }
 
 
+def _scan_path_executables() -> set[str]:
+    """Names of the files in every PATH directory, one listdir per entry.
+    
+    Cheaper than a shutil.which() walk (plus a --version run) per formatter.
+    On Windows, names are also recorded without their PATHEXT extension.
+    """
+    pathext = set()
+    if os.name == "nt":
+        pathext = {ext.lower() for ext in os.environ.get("PATHEXT", "").split(os.pathsep) if ext}
+    
+    names = set()
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if not directory:
+            continue
+        try:
+            entries = os.listdir(directory)
+        except OSError:
+            continue
+        names.update(entries)
+        if pathext:
+            for name in entries:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() in pathext:
+                    names.add(stem)
+    return names
+
+
+def _stat_signature(file_path: Path) -> Optional[tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it can't be stat'ed.
+
+    Formatters only rewrite files whose formatting changes, so a changed
+    signature after a run means the file was reformatted.
+    """
+    try:
+        st = file_path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _build_command(formatter: FormatterType, file_paths: list[Path]) -> list[str]:
+    """Expand the "{file}" placeholder into one argument per file.
+
+    Every supported formatter accepts several files in a single run.
+    """
+    cmd = []
+    for arg in FORMATTER_COMMANDS[formatter]["cmd"]:
+        if arg == "{file}":
+            cmd.extend(str(p) for p in file_paths)
+        else:
+            cmd.append(arg)
+    return cmd
+
+
 class Formatter:
     """Handles file formatting with auto-detection of formatters."""
     
     def __init__(self):
         self._available_formatters: dict[FormatterType, bool] = {}
+        self._path_executables: Optional[set[str]] = None
         self._enabled = True
         self._session_enabled: dict[str, bool] = {}
     
@@ -140,27 +188,15 @@ class Formatter:
             self._available_formatters[formatter] = False
             return False
         
-        # Check if command exists
         cmd_name = config["cmd"][0]
-        if not shutil.which(cmd_name):
-            self._available_formatters[formatter] = False
-            return False
-        
-        # Try running check command
-        try:
-            check_cmd = config.get("check_cmd", [cmd_name, "--version"])
-            proc = await asyncio.create_subprocess_exec(
-                *check_cmd,
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.DEVNULL,
-            )
-            await proc.wait()
-            available = proc.returncode == 0
-            self._available_formatters[formatter] = available
-            return available
-        except Exception:
-            self._available_formatters[formatter] = False
-            return False
+        if os.path.isabs(cmd_name):
+            available = os.access(cmd_name, os.X_OK)
+        else:
+            if self._path_executables is None:
+                self._path_executables = _scan_path_executables()
+            available = cmd_name in self._path_executables
+        self._available_formatters[formatter] = available
+        return available
     
     def get_formatters_for_file(self, file_path: Path) -> list[FormatterType]:
         """Get list of formatters for a file based on extension."""
@@ -204,21 +240,19 @@ class Formatter:
             # No formatter available - this is not an error, just skip
             return FormatResult(success=True, formatted=False)
         
-        # Get original content for comparison
+        # Remember mtime/size to tell whether the formatter rewrote the file
         try:
-            original_content = file_path.read_text()
-        except Exception as e:
+            st = file_path.stat()
+        except OSError as e:
             return FormatResult(success=False, formatted=False, error=str(e))
+        original_signature = (st.st_mtime_ns, st.st_size)
         
         # Build command
         config = FORMATTER_COMMANDS.get(formatter)
         if not config:
             return FormatResult(success=False, formatted=False, error=f"Unknown formatter: {formatter}")
         
-        cmd = [
-            arg.replace("{file}", str(file_path))
-            for arg in config["cmd"]
-        ]
+        cmd = _build_command(formatter, [file_path])
         
         try:
             proc = await asyncio.create_subprocess_exec(
@@ -239,11 +273,8 @@ class Formatter:
                 )
             
             # Check if file was modified
-            try:
-                new_content = file_path.read_text()
-                formatted = new_content != original_content
-            except Exception:
-                formatted = False
+            new_signature = _stat_signature(file_path)
+            formatted = new_signature is not None and new_signature != original_signature
             
             return FormatResult(
                 success=True,
@@ -264,6 +295,75 @@ class Formatter:
                 error=str(e),
             )
 
+    async def format_files(self, file_paths: list[Path]) -> dict[Path, FormatResult]:
+        """Format several files, running each formatter once over all of its files.
+        
+        Args:
+            file_paths: Paths of the files to format
+            
+        Returns:
+            FormatResult for each path
+        """
+        results: dict[Path, FormatResult] = {}
+        groups: dict[FormatterType, list[Path]] = {}
+        for file_path in map(Path, file_paths):
+            if not file_path.exists():
+                results[file_path] = FormatResult(success=False, formatted=False, error="File not found")
+                continue
+            formatter = await self.find_available_formatter(file_path)
+            if formatter is None:
+                results[file_path] = FormatResult(success=True, formatted=False)
+            else:
+                groups.setdefault(formatter, []).append(file_path)
+        
+        # Different formatters touch disjoint files, so run their batches side by side
+        sem = asyncio.Semaphore(os.cpu_count() or 1)
+        
+        async def run_group(formatter: FormatterType, paths: list[Path]) -> dict[Path, FormatResult]:
+            async with sem:
+                return await self._format_batch(formatter, paths)
+        
+        for group_results in await asyncio.gather(*(run_group(f, p) for f, p in groups.items())):
+            results.update(group_results)
+        return results
+    
+    async def _format_batch(self, formatter: FormatterType, file_paths: list[Path]) -> dict[Path, FormatResult]:
+        """Run one formatter process over a group of files.
+        
+        If the batch fails, the files are formatted one by one so a single
+        bad file only fails its own result.
+        """
+        if len(file_paths) == 1:
+            return {file_paths[0]: await self.format_file(file_paths[0], formatter)}
+        
+        original_signatures = [_stat_signature(p) for p in file_paths]
+        try:
+            abs_paths = [p.absolute() for p in file_paths]
+            proc = await asyncio.create_subprocess_exec(
+                *_build_command(formatter, abs_paths),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=os.path.commonpath([str(p.parent) for p in abs_paths]),
+            )
+            await proc.wait()
+            ok = proc.returncode == 0
+        except Exception:
+            ok = False
+        
+        results = {}
+        for file_path, original_signature in zip(file_paths, original_signatures):
+            if ok:
+                result = FormatResult(success=True, formatted=False, formatter=formatter.value)
+            else:
+                result = await self.format_file(file_path, formatter)
+            if result.success:
+                # Compare with the state before the batch: a failed batch may
+                # already have rewritten the files it could format
+                new_signature = _stat_signature(file_path)
+                result.formatted = new_signature is not None and new_signature != original_signature
+            results[file_path] = result
+        return results
+
 
 # Global formatter instance
 _formatter = Formatter()
@@ -277,6 +377,11 @@ async def format_file(
     return await _formatter.format_file(file_path, formatter)
 
 
+async def format_files(file_paths: list[Path]) -> dict[Path, FormatResult]:
+    """Format several files, one formatter process per formatter."""
+    return await _formatter.format_files(file_paths)
+
+
 async def format_file_if_enabled(
     file_path: Path,
     session_id: Optional[str] = None,
@@ -290,6 +395,19 @@ async def format_file_if_enabled(
     return await _formatter.format_file(file_path)
 
 
+async def format_files_if_enabled(
+    file_paths: list[Path],
+    session_id: Optional[str] = None,
+) -> Optional[dict[Path, FormatResult]]:
+    """Format several files if format on save is enabled.
+    
+    Returns None if formatting is disabled, a FormatResult per path otherwise.
+    """
+    if not _formatter.is_enabled(session_id):
+        return None
+    return await _formatter.format_files(file_paths)
+
+
 def get_formatter() -> Formatter:
     """Get the global formatter instance."""
     return _formatter
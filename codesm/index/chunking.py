@@ -1,8 +1,17 @@
 """Code chunking utilities for extracting searchable code segments"""
 
 import fnmatch
+import os
+import threading
 from pathlib import Path
 
+try:
+    from tree_sitter_language_pack import get_parser
+    TREE_SITTER_AVAILABLE = True
+except ImportError:
+    get_parser = None
+    TREE_SITTER_AVAILABLE = False
+
 CODE_EXTENSIONS = {
     ".py", ".js", ".ts", ".tsx", ".jsx", ".go", ".rs", ".java",
     ".c", ".cpp", ".h", ".hpp", ".rb", ".php", ".swift", ".kt",
@@ -13,30 +22,91 @@ SKIP_DIRS = {
     "node_modules", "__pycache__", "venv", ".venv", "dist", "build", "target"
 }
 
+# Line starts (after indentation) that open a definition in the heuristic
+# chunker; a tuple for str.startswith beats a compiled regex here
+_DEF_PREFIXES = (
+    "def ", "class ", "async def ", "function ", "const ", "let ",
+    "var ", "fn ", "func ", "pub fn ", "impl ",
+)
+_PY_DEF_PREFIXES = ("def ", "class ", "async def ")
+
+# tree-sitter grammar for each extension that has one
+TREE_SITTER_LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".jsx": "javascript",
+    ".ts": "typescript", ".tsx": "tsx", ".go": "go", ".rs": "rust",
+    ".java": "java", ".c": "c", ".h": "c", ".cpp": "cpp", ".hpp": "cpp",
+    ".rb": "ruby", ".php": "php", ".swift": "swift", ".kt": "kotlin",
+    ".scala": "scala", ".lua": "lua", ".sh": "bash", ".bash": "bash",
+}
+
+# Top-level syntax nodes that become one chunk each
+DEFINITION_NODE_TYPES = {
+    # Python
+    "function_definition", "class_definition", "decorated_definition",
+    # JavaScript / TypeScript
+    "function_declaration", "generator_function_declaration", "class_declaration",
+    "method_definition", "lexical_declaration", "variable_declaration",
+    "interface_declaration", "type_alias_declaration", "enum_declaration",
+    "export_statement",
+    # Go
+    "method_declaration", "type_declaration",
+    # Rust
+    "function_item", "impl_item", "struct_item", "enum_item", "trait_item", "mod_item",
+    # Java / Kotlin / Scala / Swift
+    "object_declaration", "object_definition",
+    "trait_definition", "protocol_declaration",
+    # C / C++
+    "struct_specifier", "class_specifier", "namespace_definition", "template_declaration",
+    # Ruby / PHP / Lua / shell
+    "method", "class", "module", "function_statement",
+}
+
+# Parsers are not thread-safe and files are chunked in a thread pool
+_local = threading.local()
+
 
 def get_code_files(root: Path, pattern: str | None = None) -> list[Path]:
     """Get all code files in directory"""
     files = []
-    for path in root.rglob("*"):
-        parts = path.parts
-        if any(p.startswith(".") or p in SKIP_DIRS for p in parts):
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
             continue
-
-        if path.is_file():
-            if pattern:
-                if fnmatch.fnmatch(path.name, pattern):
-                    files.append(path)
-            elif path.suffix in CODE_EXTENSIONS:
-                files.append(path)
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or name in SKIP_DIRS:
+                    continue
+                # DirEntry caches the type from the directory listing, so
+                # pruning and file checks need no extra stat calls
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    if pattern:
+                        if fnmatch.fnmatch(name, pattern):
+                            files.append(Path(entry.path))
+                    elif name[name.rfind("."):] in CODE_EXTENSIONS:
+                        files.append(Path(entry.path))
 
     return files
 
 
-def extract_chunks(file_path: Path, content: str) -> list[dict]:
-    """Extract meaningful code chunks from a file.
-    
-    Each chunk has: file, start_line, end_line, content
-    """
+def is_code_file(root: Path, path: Path) -> bool:
+    """Whether get_code_files(root) would list path, without walking the tree"""
+    try:
+        parts = path.relative_to(root).parts
+    except ValueError:
+        return False
+    if not parts or any(p.startswith(".") or p in SKIP_DIRS for p in parts):
+        return False
+    name = parts[-1]
+    return name[name.rfind("."):] in CODE_EXTENSIONS
+
+
+def _extract_chunks_heuristic(file_path: Path, content: str) -> list[dict]:
+    """Split on lines that look like definitions (languages without a grammar)"""
     chunks = []
     lines = content.split("\n")
 
@@ -47,43 +117,46 @@ def extract_chunks(file_path: Path, content: str) -> list[dict]:
 
     for i, line in enumerate(lines):
         stripped = line.lstrip()
-        indent = len(line) - len(stripped)
-
-        is_def = stripped.startswith((
-            "def ", "class ", "async def ", "function ", "const ", "let ",
-            "var ", "fn ", "func ", "pub fn ", "impl "
-        ))
-
-        if is_def and not in_block:
-            if current_chunk:
-                chunk_text = "\n".join(current_chunk)
-                if len(chunk_text.strip()) > 20:
-                    chunks.append({
-                        "file": str(file_path),
-                        "start_line": chunk_start + 1,
-                        "end_line": i,
-                        "content": chunk_text[:2000],
-                    })
 
-            current_chunk = [line]
-            chunk_start = i
-            in_block = True
-            block_indent = indent
-        elif in_block:
-            current_chunk.append(line)
-
-            if stripped and indent <= block_indent and not is_def and len(current_chunk) > 1:
-                chunk_text = "\n".join(current_chunk[:-1])
-                if len(chunk_text.strip()) > 20:
-                    chunks.append({
-                        "file": str(file_path),
-                        "start_line": chunk_start + 1,
-                        "end_line": i,
-                        "content": chunk_text[:2000],
-                    })
+        if not in_block:
+            if stripped.startswith(_DEF_PREFIXES):
+                if current_chunk:
+                    chunk_text = "\n".join(current_chunk)
+                    if len(chunk_text.strip()) > 20:
+                        chunks.append({
+                            "file": str(file_path),
+                            "start_line": chunk_start + 1,
+                            "end_line": i,
+                            "content": chunk_text[:2000],
+                        })
+
                 current_chunk = [line]
                 chunk_start = i
-                in_block = stripped.startswith(("def ", "class ", "async def "))
+                in_block = True
+                block_indent = len(line) - len(stripped)
+            continue
+
+        current_chunk.append(line)
+
+        # Only a non-blank line back at the block's indent can end it, so the
+        # prefix test runs for those lines alone instead of for every line
+        if (
+            stripped
+            and len(line) - len(stripped) <= block_indent
+            and len(current_chunk) > 1
+            and not stripped.startswith(_DEF_PREFIXES)
+        ):
+            chunk_text = "\n".join(current_chunk[:-1])
+            if len(chunk_text.strip()) > 20:
+                chunks.append({
+                    "file": str(file_path),
+                    "start_line": chunk_start + 1,
+                    "end_line": i,
+                    "content": chunk_text[:2000],
+                })
+            current_chunk = [line]
+            chunk_start = i
+            in_block = stripped.startswith(_PY_DEF_PREFIXES)
 
     if current_chunk:
         chunk_text = "\n".join(current_chunk)
@@ -95,7 +168,58 @@ def extract_chunks(file_path: Path, content: str) -> list[dict]:
                 "content": chunk_text[:2000],
             })
 
+    return chunks
+
+
+def _get_tree_sitter_parser(suffix: str):
+    """This thread's parser for the file extension, or None without a grammar"""
+    language = TREE_SITTER_LANGUAGES.get(suffix)
+    if get_parser is None or language is None:
+        return None
+    parsers = getattr(_local, "parsers", None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    if language not in parsers:
+        try:
+            parsers[language] = get_parser(language)
+        except Exception:
+            parsers[language] = None
+    return parsers[language]
+
+
+def _extract_chunks_tree_sitter(parser, file_path: Path, content: str) -> list[dict]:
+    """One chunk per top-level definition in the syntax tree"""
+    source = content.encode()
+    tree = parser.parse(source)
+
+    chunks = []
+    for node in tree.root_node.children:
+        if node.type not in DEFINITION_NODE_TYPES:
+            continue
+        chunk_text = source[node.start_byte:node.end_byte].decode(errors="ignore")
+        if len(chunk_text.strip()) > 20:
+            chunks.append({
+                "file": str(file_path),
+                "start_line": node.start_point[0] + 1,
+                "end_line": node.end_point[0] + 1,
+                "content": chunk_text[:2000],
+            })
+    return chunks
+
+
+def extract_chunks(file_path: Path, content: str) -> list[dict]:
+    """Extract meaningful code chunks from a file.
+    
+    Each chunk has: file, start_line, end_line, content
+    """
+    parser = _get_tree_sitter_parser(file_path.suffix)
+    if parser is not None:
+        chunks = _extract_chunks_tree_sitter(parser, file_path, content)
+    else:
+        chunks = _extract_chunks_heuristic(file_path, content)
+
     if not chunks and len(content) > 50:
+        lines = content.split("\n")
         window_size = 50
         step = 30
         for i in range(0, len(lines), step):
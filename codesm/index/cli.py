@@ -78,9 +78,13 @@ def clear_index(
     from codesm.storage.storage import Storage
     Storage.delete(["index", "project", project_id, "meta"])
     
-    cache_path = store.get_cache_path(project_id)
-    if cache_path.exists():
-        cache_path.unlink()
+    for cache_path in (
+        store.get_cache_path(project_id),
+        store.get_embeddings_path(project_id),
+        store.get_ann_path(project_id),
+    ):
+        if cache_path.exists():
+            cache_path.unlink()
     
     console.print(f"[green]Cleared index for {root}[/green]")
 
@@ -1,17 +1,42 @@
 """Persistent storage for codebase index"""
 
-import pickle
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from ..storage.storage import Storage
+from ..util import fastjson
+from .chunking import TREE_SITTER_AVAILABLE
 
-CHUNKING_VERSION = 1
+if TYPE_CHECKING:
+    import numpy as np
+
+# Chunk boundaries depend on whether tree-sitter grammars are installed, so
+# installing or removing them invalidates existing indexes
+CHUNKING_VERSION = 2 if TREE_SITTER_AVAILABLE else 1
 EMBEDDING_MODEL = "text-embedding-3-small"
 
 CACHE_DIR = Path.home() / ".cache" / "codesm" / "index"
 
 
+def _quantize(embeddings: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """Quantize rows to int8 with one float32 scale per row"""
+    import numpy as np
+
+    scales = np.abs(embeddings).max(axis=1) / 127
+    scales[scales == 0] = 1
+    quantized = np.round(embeddings / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _dequantize(quantized: "np.ndarray", scales: "np.ndarray") -> "np.ndarray":
+    """Rebuild L2-normalized float32 rows from int8 values and row scales"""
+    import numpy as np
+
+    embeddings = quantized.astype(np.float32) * scales[:, None]
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings
+
+
 class IndexStore:
     """Handles persistent storage for index metadata and embeddings"""
 
@@ -22,7 +47,17 @@ class IndexStore:
     @staticmethod
     def get_cache_path(project_id: str) -> Path:
         CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        return CACHE_DIR / f"{project_id}.pkl"
+        return CACHE_DIR / f"{project_id}.json"
+
+    @staticmethod
+    def get_embeddings_path(project_id: str) -> Path:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return CACHE_DIR / f"{project_id}.npz"
+
+    @staticmethod
+    def get_ann_path(project_id: str) -> Path:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return CACHE_DIR / f"{project_id}.faiss"
 
     @classmethod
     def load_meta(cls, project_id: str) -> dict | None:
@@ -34,35 +69,74 @@ class IndexStore:
 
     @classmethod
     def load_chunks(cls, project_id: str) -> list[dict] | None:
-        """Load chunks with embeddings from pickle cache"""
-        import numpy as np
-
+        """Load chunk metadata from JSON cache"""
         cache_path = cls.get_cache_path(project_id)
         if not cache_path.exists():
             return None
         try:
-            with open(cache_path, "rb") as f:
-                data = pickle.load(f)
-            for chunk in data:
-                if "embedding" in chunk:
-                    chunk["embedding"] = np.array(chunk["embedding"])
-            return data
+            return fastjson.loads(cache_path.read_bytes())
         except Exception:
             return None
 
     @classmethod
     def save_chunks(cls, project_id: str, chunks: list[dict]):
-        """Save chunks with embeddings to pickle cache"""
+        """Save chunk metadata to JSON cache"""
         cache_path = cls.get_cache_path(project_id)
         try:
-            chunks_to_save = []
-            for chunk in chunks:
-                chunk_copy = chunk.copy()
-                if "embedding" in chunk_copy:
-                    emb = chunk_copy["embedding"]
-                    chunk_copy["embedding"] = emb.tolist() if hasattr(emb, "tolist") else emb
-                chunks_to_save.append(chunk_copy)
-            with open(cache_path, "wb") as f:
-                pickle.dump(chunks_to_save, f)
+            cache_path.write_bytes(fastjson.dumpb(chunks))
+            # Drop the pickle written by older versions
+            cache_path.with_suffix(".pkl").unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    @classmethod
+    def load_embeddings(cls, project_id: str) -> "np.ndarray | None":
+        """Load the (n_chunks, dim) embedding matrix as float32"""
+        import numpy as np
+
+        path = cls.get_embeddings_path(project_id)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return _dequantize(data["quantized"], data["scales"])
+        except Exception:
+            return None
+
+    @classmethod
+    def save_embeddings(cls, project_id: str, embeddings: "np.ndarray"):
+        """Save the embedding matrix int8-quantized, row i belonging to chunk i"""
+        import numpy as np
+
+        try:
+            quantized, scales = _quantize(embeddings)
+            np.savez(cls.get_embeddings_path(project_id), quantized=quantized, scales=scales)
+        except Exception:
+            pass
+
+    @classmethod
+    def load_ann(cls, project_id: str):
+        """Load the faiss HNSW index, if one was saved"""
+        import faiss
+
+        path = cls.get_ann_path(project_id)
+        if not path.exists():
+            return None
+        try:
+            return faiss.read_index(str(path))
+        except Exception:
+            return None
+
+    @classmethod
+    def save_ann(cls, project_id: str, index):
+        """Save the faiss HNSW index, or drop a stale one when there is none"""
+        path = cls.get_ann_path(project_id)
+        try:
+            if index is None:
+                path.unlink(missing_ok=True)
+                return
+            import faiss
+
+            faiss.write_index(index, str(path))
         except Exception:
             pass
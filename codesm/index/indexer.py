@@ -1,16 +1,165 @@
 """Main indexing logic for codebase search"""
 
+import asyncio
+import hashlib
+import mmap
+import os
+from collections.abc import Buffer
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    xxhash = None
+    XXHASH_AVAILABLE = False
+
 from ..search.embeddings import get_embeddings
 from ..util.project_id import get_project_id
-from .chunking import extract_chunks, get_code_files
+from .chunking import extract_chunks, get_code_files, is_code_file
 from .index_store import CHUNKING_VERSION, EMBEDDING_MODEL, IndexStore
 
 
+# Shared by all indexers; file reads block on disk, so oversubscribe the CPUs
+_POOL = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4),
+    thread_name_prefix="codesm-index",
+)
+
+# Texts per get_embeddings call and number of calls kept in flight
+EMBED_BATCH = 256
+EMBED_CONCURRENCY = 8
+
+# Below this many chunks an exact scan is as fast as an HNSW graph search
+ANN_MIN_CHUNKS = 1000
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 64
+
+# Normalized query embeddings, least recently used first
+QUERY_CACHE_SIZE = 512
+_query_cache: dict[str, np.ndarray] = {}
+
+
+def _fingerprint(data: Buffer) -> str:
+    """Content hash used to tell real edits from touched files"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _hash_file_or_none(path: Path) -> str | None:
+    """Fingerprint a file through a read-only mapping, without copying it into memory"""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap refuses empty files
+                return _fingerprint(b"")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _fingerprint(mm)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_and_chunk(path: Path) -> tuple[str, dict, list[dict]]:
+    """Stat, read, fingerprint and chunk one file (runs in the index thread pool)"""
+    stat = path.stat()
+    data = path.read_bytes()
+    state = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": _fingerprint(data)}
+    content = data.decode(errors="ignore")
+    if "\r" in content:
+        # Same universal-newline handling read_text() applied
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return str(path), state, extract_chunks(path, content)
+
+
+async def _read_and_chunk_all(files: list[Path]) -> tuple[list[dict], dict[str, dict]]:
+    """Read and chunk files concurrently, skipping any that fail"""
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(_POOL, _read_and_chunk, f) for f in files),
+        return_exceptions=True,
+    )
+
+    all_chunks = []
+    file_state = {}
+    for result in results:
+        if isinstance(result, BaseException):
+            continue
+        path_str, state, chunks = result
+        file_state[path_str] = state
+        all_chunks.extend(chunks)
+    return all_chunks, file_state
+
+
+async def _embed_chunks(chunks: list[dict]) -> np.ndarray:
+    """Embed chunk contents into one L2-normalized float32 matrix.
+
+    Batches are fed through a bounded queue to a few concurrent workers,
+    each writing its rows straight into the preallocated matrix.
+    """
+    n = len(chunks)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EMBED_CONCURRENCY * 2)
+    matrix: np.ndarray | None = None
+
+    async def produce():
+        for start in range(0, n, EMBED_BATCH):
+            texts = [c["content"] for c in chunks[start:start + EMBED_BATCH]]
+            await queue.put((start, texts))
+        for _ in range(EMBED_CONCURRENCY):
+            await queue.put(None)
+
+    async def consume():
+        nonlocal matrix
+        while (item := await queue.get()) is not None:
+            start, texts = item
+            rows = np.asarray(await get_embeddings(texts), dtype=np.float32)
+            if matrix is None:
+                matrix = np.empty((n, rows.shape[1]), dtype=np.float32)
+            matrix[start:start + len(rows)] = rows
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(produce())
+        for _ in range(EMBED_CONCURRENCY):
+            tg.create_task(consume())
+
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+async def _embed_query(query: str) -> np.ndarray:
+    """Normalized embedding for a search query, memoized across searches"""
+    embedding = _query_cache.pop(query, None)
+    if embedding is None:
+        embedding = np.array((await get_embeddings([query]))[0], dtype=np.float32)
+        embedding /= np.linalg.norm(embedding)
+        embedding.flags.writeable = False
+        if len(_query_cache) >= QUERY_CACHE_SIZE:
+            del _query_cache[next(iter(_query_cache))]
+    _query_cache[query] = embedding
+    return embedding
+
+
+def _build_ann(embeddings: np.ndarray | None):
+    """HNSW inner-product index over the embeddings, or None to scan exactly"""
+    if faiss is None or embeddings is None or len(embeddings) < ANN_MIN_CHUNKS:
+        return None
+    index = faiss.IndexHNSWFlat(embeddings.shape[1], HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+    return index
+
+
 class ProjectIndexer:
     """Indexes a project for semantic code search"""
 
@@ -18,6 +167,10 @@ class ProjectIndexer:
         self.root = root.resolve()
         self.project_id = get_project_id(self.root)
         self._chunks: list[dict] | None = None
+        # Row i is the normalized embedding of self._chunks[i]
+        self._embeddings: np.ndarray | None = None
+        # faiss HNSW graph over self._embeddings for large indexes (optional)
+        self._ann = None
 
     def is_stale(self) -> bool:
         """Check if index needs rebuild due to version/model change"""
@@ -30,9 +183,12 @@ class ProjectIndexer:
             return True
         return False
 
-    def _get_current_file_state(self) -> dict[str, dict]:
-        """Get current mtime/size for all code files"""
-        files = get_code_files(self.root)
+    def _get_current_file_state(self, paths: set[str] | None = None) -> dict[str, dict]:
+        """Get current mtime/size for all code files, or only those among paths"""
+        if paths is None:
+            files = get_code_files(self.root)
+        else:
+            files = [p for p in map(Path, paths) if is_code_file(self.root, p)]
         state = {}
         for f in files:
             try:
@@ -42,27 +198,64 @@ class ProjectIndexer:
                 pass
         return state
 
-    def _detect_changes(self, old_state: dict[str, dict]) -> tuple[list[Path], list[str]]:
-        """Detect changed/new files and deleted files"""
-        current_state = self._get_current_file_state()
-        
-        changed = []
+    def _detect_changes(
+        self, old_state: dict[str, dict], paths: set[str] | None = None
+    ) -> tuple[list[Path], set[str], dict[str, dict]]:
+        """Detect changed/new files and deleted files.
+
+        Files whose mtime/size moved but whose content hash did not (a touch,
+        a git checkout) are not reported as changed; their refreshed state is
+        returned as the third element so the next check takes the fast path.
+        With paths, only those files are checked instead of the whole tree.
+        """
+        current_state = self._get_current_file_state(paths)
+
+        candidates = []
         for path_str, info in current_state.items():
             old_info = old_state.get(path_str)
             if not old_info or old_info["mtime"] != info["mtime"] or old_info["size"] != info["size"]:
+                candidates.append(path_str)
+
+        changed = []
+        touched = {}
+        hashes = _POOL.map(_hash_file_or_none, map(Path, candidates))
+        for path_str, digest in zip(candidates, hashes):
+            old_hash = old_state.get(path_str, {}).get("hash")
+            if digest is not None and digest == old_hash:
+                touched[path_str] = {**current_state[path_str], "hash": digest}
+            else:
                 changed.append(Path(path_str))
 
-        deleted = [p for p in old_state if p not in current_state]
+        checked = old_state.keys() if paths is None else old_state.keys() & paths
+        deleted = checked - current_state.keys()
         
-        return changed, deleted
+        return changed, deleted, touched
+
+    def _load_cached(self) -> bool:
+        """Load chunks and embeddings from disk if both are present and agree"""
+        chunks = IndexStore.load_chunks(self.project_id)
+        embeddings = IndexStore.load_embeddings(self.project_id)
+        if not chunks or embeddings is None or len(embeddings) != len(chunks):
+            return False
+        self._chunks = chunks
+        self._embeddings = embeddings
+        self._ann = None
+        if FAISS_AVAILABLE:
+            ann = IndexStore.load_ann(self.project_id)
+            self._ann = ann if ann is not None and ann.ntotal == len(chunks) else _build_ann(embeddings)
+        return True
+
+    def _save(self, meta: dict):
+        IndexStore.save_meta(self.project_id, meta)
+        IndexStore.save_chunks(self.project_id, self._chunks)
+        if self._embeddings is not None:
+            IndexStore.save_embeddings(self.project_id, self._embeddings)
+        IndexStore.save_ann(self.project_id, self._ann)
 
     async def ensure_index(self, force: bool = False) -> list[dict]:
         """Build index if missing, stale, or forced"""
-        if not force and not self.is_stale():
-            chunks = IndexStore.load_chunks(self.project_id)
-            if chunks:
-                self._chunks = chunks
-                return chunks
+        if not force and not self.is_stale() and self._load_cached():
+            return self._chunks
 
         return await self._build_full_index()
 
@@ -71,30 +264,12 @@ class ProjectIndexer:
         files = get_code_files(self.root)
         if not files:
             self._chunks = []
+            self._embeddings = None
+            self._ann = None
             return []
 
-        all_chunks = []
-        file_state = {}
-
-        for file_path in files:
-            try:
-                stat = file_path.stat()
-                file_state[str(file_path)] = {"mtime": stat.st_mtime, "size": stat.st_size}
-                content = file_path.read_text(errors="ignore")
-                chunks = extract_chunks(file_path, content)
-                all_chunks.extend(chunks)
-            except Exception:
-                continue
-
-        if all_chunks:
-            texts = [c["content"] for c in all_chunks]
-            embeddings_list = await get_embeddings(texts)
-            embeddings = np.array(embeddings_list)
-            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-            embeddings = embeddings / norms
-
-            for i, chunk in enumerate(all_chunks):
-                chunk["embedding"] = embeddings[i]
+        all_chunks, file_state = await _read_and_chunk_all(files)
+        embeddings = await _embed_chunks(all_chunks) if all_chunks else None
 
         meta = {
             "root": str(self.root),
@@ -105,64 +280,67 @@ class ProjectIndexer:
             "file_state": file_state,
         }
 
-        IndexStore.save_meta(self.project_id, meta)
-        IndexStore.save_chunks(self.project_id, all_chunks)
-
         self._chunks = all_chunks
+        self._embeddings = embeddings
+        self._ann = _build_ann(embeddings)
+        self._save(meta)
         return all_chunks
 
     async def update_incremental(self) -> list[dict]:
         """Update index for changed files only"""
+        return await self._update(None)
+
+    async def update_files(self, paths: list[Path]) -> list[dict]:
+        """Update index for the given files only (e.g. from watcher events).
+
+        Skips the tree walk: paths that are not indexable code files are
+        ignored, and paths that no longer exist are dropped from the index.
+        """
+        return await self._update({str(p) for p in paths})
+
+    async def _update(self, paths: set[str] | None) -> list[dict]:
         meta = IndexStore.load_meta(self.project_id)
         if not meta or self.is_stale():
             return await self._build_full_index()
 
-        old_state = meta.get("file_state", {})
-        changed_files, deleted_files = self._detect_changes(old_state)
+        # Updated in place; it is the dict saved with meta
+        file_state = meta.setdefault("file_state", {})
+        changed_files, deleted_files, touched_state = self._detect_changes(file_state, paths)
+
+        if self._chunks is None and not self._load_cached():
+            return await self._build_full_index()
 
+        file_state.update(touched_state)
         if not changed_files and not deleted_files:
-            if self._chunks is None:
-                self._chunks = IndexStore.load_chunks(self.project_id) or []
+            if touched_state:
+                IndexStore.save_meta(self.project_id, meta)
             return self._chunks
 
-        chunks = IndexStore.load_chunks(self.project_id) or []
-
-        deleted_set = set(deleted_files)
-        changed_set = {str(f) for f in changed_files}
-        chunks = [c for c in chunks if c["file"] not in deleted_set and c["file"] not in changed_set]
+        dropped = deleted_files | {str(f) for f in changed_files}
+        keep = [i for i, c in enumerate(self._chunks) if c["file"] not in dropped]
+        chunks = [self._chunks[i] for i in keep]
+        # None once every indexed file is gone (or nothing was indexable)
+        embeddings = self._embeddings[keep] if self._embeddings is not None else None
 
-        new_chunks = []
-        new_file_state = {k: v for k, v in old_state.items() if k not in deleted_set}
-
-        for file_path in changed_files:
-            try:
-                stat = file_path.stat()
-                new_file_state[str(file_path)] = {"mtime": stat.st_mtime, "size": stat.st_size}
-                content = file_path.read_text(errors="ignore")
-                file_chunks = extract_chunks(file_path, content)
-                new_chunks.extend(file_chunks)
-            except Exception:
-                continue
+        for path_str in deleted_files:
+            del file_state[path_str]
+        new_chunks, changed_state = await _read_and_chunk_all(changed_files)
+        file_state.update(changed_state)
 
         if new_chunks:
-            texts = [c["content"] for c in new_chunks]
-            embeddings_list = await get_embeddings(texts)
-            embeddings = np.array(embeddings_list)
-            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-            embeddings = embeddings / norms
-
-            for i, chunk in enumerate(new_chunks):
-                chunk["embedding"] = embeddings[i]
-
+            new_embeddings = await _embed_chunks(new_chunks)
+            embeddings = (
+                new_embeddings if embeddings is None else np.vstack([embeddings, new_embeddings])
+            )
             chunks.extend(new_chunks)
 
         meta["updated_at"] = datetime.now().isoformat()
-        meta["file_state"] = new_file_state
-
-        IndexStore.save_meta(self.project_id, meta)
-        IndexStore.save_chunks(self.project_id, chunks)
 
         self._chunks = chunks
+        self._embeddings = embeddings if chunks else None
+        # HNSW graphs don't support removal, so rebuild from the new matrix
+        self._ann = _build_ann(self._embeddings)
+        self._save(meta)
         return chunks
 
     async def search(self, query: str, top_k: int = 5) -> list[dict]:
@@ -173,24 +351,29 @@ class ProjectIndexer:
         if not self._chunks:
             return []
 
-        query_embeddings = await get_embeddings([query])
-        query_embedding = np.array(query_embeddings[0])
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
+        query_embedding = await _embed_query(query)
 
-        similarities = []
-        for chunk in self._chunks:
-            if "embedding" not in chunk:
-                continue
-            sim = float(np.dot(query_embedding, chunk["embedding"]))
-            similarities.append((sim, chunk))
+        k = min(top_k * 2, len(self._chunks))
+        if self._ann is not None:
+            # Approximate candidates from the HNSW graph
+            _, ids = self._ann.search(query_embedding[None, :], k)
+            top = ids[0][ids[0] >= 0]
+        else:
+            # One matrix-vector product over all chunks, then partially select
+            # a few spare candidates for dedup
+            sims = self._embeddings @ query_embedding
+            top = np.argpartition(-sims, k - 1)[:k]
 
-        similarities.sort(key=lambda x: x[0], reverse=True)
+        # Score the candidates exactly and sort only those
+        scores = self._embeddings[top] @ query_embedding
+        order = np.argsort(-scores)
 
         results = []
         seen = set()
-        for sim, chunk in similarities:
+        for i, sim in zip(top[order], scores[order]):
             if len(results) >= top_k:
                 break
+            chunk = self._chunks[i]
             key = f"{chunk['file']}:{chunk['start_line']}"
             if key in seen:
                 continue
@@ -200,7 +383,7 @@ class ProjectIndexer:
                 "start_line": chunk["start_line"],
                 "end_line": chunk["end_line"],
                 "content": chunk["content"],
-                "score": sim,
+                "score": float(sim),
             })
 
         return results
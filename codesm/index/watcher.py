@@ -1,41 +1,135 @@
-"""Background polling watcher for incremental index updates"""
+"""Background watcher for incremental index updates"""
 
 import asyncio
 from pathlib import Path
 
 from .indexer import ProjectIndexer
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+# Wait this long after an event for the rest of a burst (save, checkout)
+DEBOUNCE_SECONDS = 0.1
+
+# Events that don't change file contents
+_IGNORED_EVENTS = {"opened", "closed_no_write"}
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events (observer thread) to the event loop's queue.
+
+    Queues changed file paths; a directory create/delete/move queues None,
+    which asks for a full incremental scan since the files under it moved
+    without per-file events.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self._loop = loop
+        self._queue = queue
+
+    def on_any_event(self, event):
+        if event.event_type in _IGNORED_EVENTS:
+            return
+        if event.is_directory:
+            if event.event_type == "modified":
+                return
+            paths = [None]
+        else:
+            paths = [event.src_path]
+            if event.dest_path:
+                paths.append(event.dest_path)
+        for path in paths:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, path)
+
 
 class IndexWatcher:
-    """Polls for file changes and updates index incrementally"""
+    """Updates the index incrementally as files change.
+
+    Uses native file system events (inotify/FSEvents/ReadDirectoryChangesW)
+    through watchdog when installed, and falls back to polling otherwise.
+    """
 
     def __init__(self):
         self._task: asyncio.Task | None = None
         self._running = False
         self._indexer: ProjectIndexer | None = None
+        self._observer = None
 
     def start(self, root: Path, interval: int = 300):
-        """Start background polling task"""
+        """Start watching; interval is the polling period without watchdog"""
         if self._task is not None:
             return
 
         self._indexer = ProjectIndexer(root)
         self._running = True
+        if WATCHDOG_AVAILABLE:
+            queue: asyncio.Queue = asyncio.Queue()
+            observer = Observer()
+            observer.schedule(
+                _EventHandler(asyncio.get_running_loop(), queue),
+                str(self._indexer.root),
+                recursive=True,
+            )
+            try:
+                observer.start()
+            except OSError:
+                # e.g. inotify watch limit reached
+                pass
+            else:
+                self._observer = observer
+                self._task = asyncio.create_task(self._event_loop(queue))
+                return
         self._task = asyncio.create_task(self._poll_loop(interval))
 
     def stop(self):
-        """Stop polling"""
+        """Stop watching, without waiting for the observer thread to exit"""
         self._running = False
+        if self._observer is not None:
+            # A daemon thread; it exits on its own once stopped
+            self._observer.stop()
+            self._observer = None
         if self._task is not None:
             self._task.cancel()
             self._task = None
 
-    async def _poll_loop(self, interval: int):
-        """Main polling loop"""
+    async def astop(self):
+        """Stop watching and wait (off the event loop) for the observer thread"""
+        observer = self._observer
+        self.stop()
+        if observer is not None:
+            await asyncio.to_thread(observer.join, 1)
+
+    async def _event_loop(self, queue: asyncio.Queue):
+        """Apply queued changes, batching each burst of events"""
+        # Catch up on changes made while nothing was watching
+        await self._poll_once()
         while self._running:
+            paths = {await queue.get()}
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+            while not queue.empty():
+                paths.add(queue.get_nowait())
             try:
-                if self._indexer:
+                if None in paths:
                     await self._indexer.update_incremental()
+                else:
+                    await self._indexer.update_files([Path(p) for p in paths])
             except Exception:
                 pass
+
+    async def _poll_once(self):
+        try:
+            if self._indexer:
+                await self._indexer.update_incremental()
+        except Exception:
+            pass
+
+    async def _poll_loop(self, interval: int):
+        """Main polling loop"""
+        while self._running:
+            await self._poll_once()
             await asyncio.sleep(interval)
@@ -1,7 +1,9 @@
 """LSP client module for diagnostics and code intelligence"""
 
 import asyncio
+import functools
 import logging
+import os
 import shutil
 from pathlib import Path
 from typing import Literal, Optional
@@ -21,6 +23,128 @@ logger = logging.getLogger(__name__)
 
 _clients: dict[str, LSPClient] = {}
 _root_path: Optional[str] = None
+# (per-client diagnostics generations, all diagnostics) from the last call
+_diagnostics_cache: Optional[tuple[tuple, list[Diagnostic]]] = None
+
+# Auto-detection, in start order: if any of the extensions is present in
+# the workspace, start the first of the servers whose executable is on PATH
+_AUTODETECT: list[tuple[tuple[str, ...], tuple[str, ...]]] = [
+    ((".py",), ("python", "python-pyright")),
+    ((".ts", ".js"), ("typescript",)),
+    ((".rs",), ("rust",)),
+    ((".go",), ("go",)),
+    ((".vue",), ("vue",)),
+    ((".svelte",), ("svelte",)),
+    ((".cpp", ".c"), ("clangd",)),
+    ((".lua",), ("lua",)),
+    ((".zig",), ("zig",)),
+    ((".html",), ("html",)),
+    ((".css", ".scss"), ("css",)),
+    ((".json",), ("json",)),
+    ((".yaml", ".yml"), ("yaml",)),
+    ((".sh",), ("bash",)),
+]
+
+_DETECT_EXTENSIONS = frozenset(ext for exts, _ in _AUTODETECT for ext in exts)
+
+# Alternative servers for the same language; running more than one of a
+# group analyzes every buffer twice
+_CONFLICT_GROUPS: list[frozenset[str]] = [
+    frozenset(keys) for _, keys in _AUTODETECT if len(keys) > 1
+]
+
+# Directories never worth descending into for detection
+_DETECT_SKIP_DIRS = {"node_modules", "__pycache__", "venv", "target", "dist", "build"}
+
+
+@functools.lru_cache(maxsize=64)
+def _which(name: str) -> Optional[str]:
+    """shutil.which, memoized until shutdown() so repeated init() calls skip the PATH walk"""
+    return shutil.which(name)
+
+
+def refresh_available_servers() -> None:
+    """Forget memoized executable lookups so the next init() re-reads PATH.
+
+    For long-running processes whose PATH changes, or after installing a
+    language server without restarting.
+    """
+    _which.cache_clear()
+
+
+def _resolve_conflicts(servers: list[str]) -> list[str]:
+    """Drop repeated keys and any server after the first of its conflict group"""
+    kept: list[str] = []
+    taken: set[str] = set()
+    for key in servers:
+        if key in taken:
+            if key not in kept:
+                logger.info(f"Not starting LSP server {key}: an alternative is already selected")
+            continue
+        kept.append(key)
+        taken.add(key)
+        for group in _CONFLICT_GROUPS:
+            if key in group:
+                taken |= group
+    return kept
+
+
+def _detect_extensions(root: str) -> set[str]:
+    """Collect the detectable file extensions present under root.
+
+    One scandir walk for all languages, stopping as soon as every
+    extension in _DETECT_EXTENSIONS has been seen.
+    """
+    found: set[str] = set()
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or name in _DETECT_SKIP_DIRS:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    ext = name[name.rfind("."):] if "." in name else ""
+                    if ext in _DETECT_EXTENSIONS and ext not in found:
+                        found.add(ext)
+                        if len(found) == len(_DETECT_EXTENSIONS):
+                            return found
+    return found
+
+
+async def _git_extensions(root: str) -> Optional[set[str]]:
+    """Detectable extensions among files git tracks or would track under root.
+
+    Reads git's index instead of walking the tree, and honours .gitignore.
+    Returns None when root isn't in a git work tree or git isn't installed.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git", "-C", root, "ls-files", "-z", "--cached", "--others", "--exclude-standard",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+    except OSError:
+        return None
+    if process.returncode != 0:
+        return None
+
+    wanted = {ext.encode(): ext for ext in _DETECT_EXTENSIONS}
+    found: set[str] = set()
+    for path in stdout.split(b"\0"):
+        ext = wanted.get(os.path.splitext(path)[1])
+        if ext is not None:
+            found.add(ext)
+            if len(found) == len(wanted):
+                break
+    return found
 
 
 async def init(
@@ -43,66 +167,18 @@ async def init(
     
     if servers is None:
         servers = []
-        workspace = Path(root_path)
-        
-        if list(workspace.rglob("*.py"))[:1]:
-            if shutil.which("pylsp"):
-                servers.append("python")
-            elif shutil.which("pyright-langserver"):
-                servers.append("python-pyright")
-        
-        if list(workspace.rglob("*.ts"))[:1] or list(workspace.rglob("*.js"))[:1]:
-            if shutil.which("typescript-language-server"):
-                servers.append("typescript")
-        
-        if list(workspace.rglob("*.rs"))[:1]:
-            if shutil.which("rust-analyzer"):
-                servers.append("rust")
-        
-        if list(workspace.rglob("*.go"))[:1]:
-            if shutil.which("gopls"):
-                servers.append("go")
-        
-        if list(workspace.rglob("*.vue"))[:1]:
-            if shutil.which("vue-language-server"):
-                servers.append("vue")
-        
-        if list(workspace.rglob("*.svelte"))[:1]:
-            if shutil.which("svelteserver"):
-                servers.append("svelte")
-        
-        if list(workspace.rglob("*.cpp"))[:1] or list(workspace.rglob("*.c"))[:1]:
-            if shutil.which("clangd"):
-                servers.append("clangd")
-        
-        if list(workspace.rglob("*.lua"))[:1]:
-            if shutil.which("lua-language-server"):
-                servers.append("lua")
-        
-        if list(workspace.rglob("*.zig"))[:1]:
-            if shutil.which("zls"):
-                servers.append("zig")
-        
-        if list(workspace.rglob("*.html"))[:1]:
-            if shutil.which("vscode-html-language-server"):
-                servers.append("html")
-        
-        if list(workspace.rglob("*.css"))[:1] or list(workspace.rglob("*.scss"))[:1]:
-            if shutil.which("vscode-css-language-server"):
-                servers.append("css")
-        
-        if list(workspace.rglob("*.json"))[:1]:
-            if shutil.which("vscode-json-language-server"):
-                servers.append("json")
-        
-        if list(workspace.rglob("*.yaml"))[:1] or list(workspace.rglob("*.yml"))[:1]:
-            if shutil.which("yaml-language-server"):
-                servers.append("yaml")
-        
-        if list(workspace.rglob("*.sh"))[:1]:
-            if shutil.which("bash-language-server"):
-                servers.append("bash")
-    
+        found = await _git_extensions(root_path)
+        if found is None:
+            found = _detect_extensions(root_path)
+        for exts, keys in _AUTODETECT:
+            if found.isdisjoint(exts):
+                continue
+            for key in keys:
+                if _which(SERVERS[key].command[0]):
+                    servers.append(key)
+                    break
+    
+    servers = _resolve_conflicts(servers)
     results = {}
     
     for key in servers:
@@ -114,7 +190,7 @@ async def init(
         config = SERVERS[key]
         
         executable = config.command[0]
-        if not shutil.which(executable):
+        if not _which(executable):
             logger.warning(f"LSP server executable not found: {executable}")
             results[key] = False
             continue
@@ -158,8 +234,15 @@ def diagnostics(path: Optional[str] = None) -> list[Diagnostic]:
         path: Optional file path to filter diagnostics
     
     Returns:
-        List of Diagnostic objects
+        List of Diagnostic objects (shared; don't modify)
     """
+    global _diagnostics_cache
+    if path is None:
+        key = tuple((id(client), client.diagnostics_generation) for client in _clients.values())
+        if _diagnostics_cache is None or _diagnostics_cache[0] != key:
+            _diagnostics_cache = (key, [d for c in _clients.values() for d in c.get_diagnostics()])
+        return _diagnostics_cache[1]
+
     all_diags = []
     for client in _clients.values():
         all_diags.extend(client.get_diagnostics(path))
@@ -188,11 +271,17 @@ async def touch_file(
     if not clients:
         return []
     
-    for client in clients:
-        await client.did_open(abs_path)
+    # Read the file once for all servers that haven't opened it yet
+    text = None
+    if sum(not client.is_open(abs_path) for client in clients) > 1:
+        try:
+            text = Path(abs_path).read_text()
+        except OSError:
+            pass
+    await asyncio.gather(*(client.did_open(abs_path, text) for client in clients))
     
     if wait_for_diagnostics:
-        await asyncio.sleep(min(timeout, 2.0))
+        await asyncio.gather(*(c.wait_for_diagnostics(abs_path, timeout) for c in clients))
     
     all_diags = []
     for client in clients:
@@ -218,12 +307,10 @@ async def goto_definition(path: str, line: int, column: int) -> list[Location]:
     if not clients:
         return []
     
-    all_locations = []
-    for client in clients:
-        locations = await client.definition(abs_path, line, column)
-        all_locations.extend(locations)
-    
-    return all_locations
+    results = await asyncio.gather(
+        *(client.definition(abs_path, line, column) for client in clients)
+    )
+    return [location for locations in results for location in locations]
 
 
 async def find_references(
@@ -247,12 +334,10 @@ async def find_references(
     if not clients:
         return []
     
-    all_locations = []
-    for client in clients:
-        locations = await client.references(abs_path, line, column, include_declaration)
-        all_locations.extend(locations)
-    
-    return all_locations
+    results = await asyncio.gather(
+        *(client.references(abs_path, line, column, include_declaration) for client in clients)
+    )
+    return [location for locations in results for location in locations]
 
 
 async def hover(path: str, line: int, column: int) -> Optional[Hover]:
@@ -294,12 +379,8 @@ async def document_symbols(path: str) -> list[Symbol]:
     if not clients:
         return []
     
-    all_symbols = []
-    for client in clients:
-        symbols = await client.document_symbols(abs_path)
-        all_symbols.extend(symbols)
-    
-    return all_symbols
+    results = await asyncio.gather(*(client.document_symbols(abs_path) for client in clients))
+    return [symbol for symbols in results for symbol in symbols]
 
 
 async def workspace_symbols(query: str) -> list[Symbol]:
@@ -312,12 +393,10 @@ async def workspace_symbols(query: str) -> list[Symbol]:
     Returns:
         List of Symbol objects
     """
-    all_symbols = []
-    for client in _clients.values():
-        symbols = await client.workspace_symbols(query)
-        all_symbols.extend(symbols)
-    
-    return all_symbols
+    results = await asyncio.gather(
+        *(client.workspace_symbols(query) for client in _clients.values())
+    )
+    return [symbol for symbols in results for symbol in symbols]
 
 
 async def call_hierarchy(
@@ -341,17 +420,16 @@ async def call_hierarchy(
     if not clients:
         return []
     
-    all_calls = []
-    for client in clients:
+    async def client_calls(client: LSPClient) -> list:
         items = await client.prepare_call_hierarchy(abs_path, line, column)
-        for item in items:
-            if direction == "incoming":
-                calls = await client.incoming_calls(item)
-            else:
-                calls = await client.outgoing_calls(item)
-            all_calls.extend(calls)
-    
-    return all_calls
+        if direction == "incoming":
+            results = await asyncio.gather(*(client.incoming_calls(item) for item in items))
+        else:
+            results = await asyncio.gather(*(client.outgoing_calls(item) for item in items))
+        return [call for calls in results for call in calls]
+
+    results = await asyncio.gather(*(client_calls(client) for client in clients))
+    return [call for calls in results for call in calls]
 
 
 def status() -> dict[str, dict]:
@@ -367,20 +445,22 @@ def status() -> dict[str, dict]:
             "name": client.config.name,
             "running": client.process is not None and client.process.returncode is None,
             "initialized": client._initialized,
-            "diagnostics_count": len(client.get_diagnostics()),
+            "diagnostics_count": client._diagnostics_count,
         }
     return result
 
 
 async def shutdown() -> None:
     """Shutdown all connected LSP servers."""
-    global _clients
+    global _clients, _diagnostics_cache
     
     tasks = [client.shutdown() for client in _clients.values()]
     if tasks:
         await asyncio.gather(*tasks, return_exceptions=True)
     
     _clients.clear()
+    _diagnostics_cache = None
+    refresh_available_servers()
     logger.info("All LSP servers shut down")
 
 
@@ -389,6 +469,7 @@ __all__ = [
     "init",
     "shutdown",
     "status",
+    "refresh_available_servers",
     # File operations
     "touch_file",
     "diagnostics",
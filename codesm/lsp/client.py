@@ -1,19 +1,27 @@
 """LSP client implementation using JSON-RPC over stdin/stdout"""
 
 import asyncio
-import json
 import logging
+import os
+from collections import deque
+from itertools import chain
 from pathlib import Path
 from typing import Any, Optional
 from dataclasses import dataclass, field
 from urllib.parse import quote, unquote, urlparse
 
-from .servers import ServerConfig
+from codesm.util import fastjson
+
+from .servers import LANGUAGE_IDS, ServerConfig
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# LSP DiagnosticSeverity values
+_SEVERITY = {1: "error", 2: "warning", 3: "info", 4: "hint"}
+
+
+@dataclass(slots=True)
 class Diagnostic:
     path: str
     line: int
@@ -73,8 +81,33 @@ class LSPClient:
     _reader_task: Optional[asyncio.Task] = None
     _initialized: bool = False
     _open_docs: dict[str, dict] = field(default_factory=dict)
+    # Set when diagnostics for the path arrive, cleared when it changes
+    _diag_events: dict[str, asyncio.Event] = field(default_factory=dict)
+    # Bumped on every publish; _flat_diagnostics caches all of them flattened
+    diagnostics_generation: int = 0
+    _flat_diagnostics: Optional[list[Diagnostic]] = None
+    _diagnostics_count: int = 0
+    _uri_cache: dict[str, str] = field(default_factory=dict)
+    # Derived from root_path once, in __post_init__
+    root_uri: str = field(init=False, default="")
+    root_name: str = field(init=False, default="")
+    _root_abs: str = field(init=False, default="")
+    _workspace_prefix: str = field(init=False, default="")
+    # Debounced didChange sends, by URI
+    _pending_changes: dict[str, asyncio.Task] = field(default_factory=dict)
+    # Outgoing header and body buffers; the writer task flushes each batch at once
+    _tx_queue: deque[bytes] = field(default_factory=deque)
+    _tx_wake: asyncio.Event = field(default_factory=asyncio.Event)
+    _writer_task: Optional[asyncio.Task] = None
     server_capabilities: dict = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        root = Path(self.root_path).resolve()
+        self._root_abs = str(root)
+        self._workspace_prefix = os.path.join(self._root_abs, "")
+        self.root_uri = root.as_uri()
+        self.root_name = root.name
+
     async def start(self) -> bool:
         """Start the language server process."""
         try:
@@ -86,6 +119,7 @@ class LSPClient:
                 cwd=self.root_path,
             )
             self._reader_task = asyncio.create_task(self._read_messages())
+            self._writer_task = asyncio.create_task(self._write_messages())
             return True
         except FileNotFoundError:
             logger.warning(f"LSP server not found: {self.config.command[0]}")
@@ -96,12 +130,16 @@ class LSPClient:
 
     def _path_to_uri(self, path: str) -> str:
         """Convert a file path to a file:// URI with proper encoding."""
-        file_path = Path(path)
-        if not file_path.is_absolute():
-            file_path = Path(self.root_path).resolve() / path
-        else:
-            file_path = file_path.resolve()
-        return file_path.as_uri()
+        # Memoized: edits call this per keystroke, and resolve() stats
+        uri = self._uri_cache.get(path)
+        if uri is None:
+            file_path = Path(path)
+            if not file_path.is_absolute():
+                file_path = Path(self.root_path).resolve() / path
+            else:
+                file_path = file_path.resolve()
+            uri = self._uri_cache[path] = file_path.as_uri()
+        return uri
 
     def _uri_to_path(self, uri: str) -> str:
         """Convert a file:// URI to an absolute path."""
@@ -124,13 +162,10 @@ class LSPClient:
         if not self.process:
             return False
 
-        root_path_abs = Path(self.root_path).resolve()
-        root_uri = root_path_abs.as_uri()
-
         result = await self._request("initialize", {
             "processId": None,
-            "rootUri": root_uri,
-            "rootPath": str(root_path_abs),
+            "rootUri": self.root_uri,
+            "rootPath": self._root_abs,
             "capabilities": {
                 "textDocument": {
                     "publishDiagnostics": {
@@ -168,7 +203,7 @@ class LSPClient:
                 },
             },
             "workspaceFolders": [
-                {"uri": root_uri, "name": root_path_abs.name}
+                {"uri": self.root_uri, "name": self.root_name}
             ],
         })
         
@@ -179,33 +214,32 @@ class LSPClient:
             return True
         return False
 
+    def is_open(self, path: str) -> bool:
+        """Whether the server has been sent didOpen for the file."""
+        return self._path_to_uri(path) in self._open_docs
+
     async def did_open(self, path: str, text: Optional[str] = None) -> None:
         """Notify the server that a file was opened."""
         if not self._initialized:
             return
 
-        file_path = Path(path)
-        if not file_path.is_absolute():
-            file_path = Path(self.root_path).resolve() / path
-        else:
-            file_path = file_path.resolve()
-
-        uri = file_path.as_uri()
-        
+        uri = self._path_to_uri(path)
         if uri in self._open_docs:
             return
 
+        file_path = self._uri_to_path(uri)
         if text is None:
             try:
-                text = file_path.read_text()
+                text = Path(file_path).read_text()
             except Exception as e:
                 logger.warning(f"Failed to read file {path}: {e}")
                 return
 
-        language_id = self._get_language_id(str(file_path))
+        language_id = self._get_language_id(file_path)
         version = 1
         
         self._open_docs[uri] = {"version": version, "text": text}
+        self._diag_events[file_path] = asyncio.Event()
 
         await self._notify("textDocument/didOpen", {
             "textDocument": {
@@ -221,60 +255,96 @@ class LSPClient:
         if not self._initialized:
             return
 
-        file_path = Path(path)
-        if not file_path.is_absolute():
-            file_path = Path(self.root_path).resolve() / path
-        else:
-            file_path = file_path.resolve()
-
-        uri = file_path.as_uri()
-        
+        uri = self._path_to_uri(path)
         if uri not in self._open_docs:
             await self.did_open(path, text)
             return
 
-        self._open_docs[uri]["version"] += 1
         self._open_docs[uri]["text"] = text
-        version = self._open_docs[uri]["version"]
+        event = self._diag_events.get(self._uri_to_path(uri))
+        if event is not None:
+            event.clear()
+
+        delay = self.config.debounce_ms / 1000
+        if delay <= 0:
+            await self._send_change(uri)
+            return
 
+        # A burst of edits sends one notification with the final text
+        pending = self._pending_changes.pop(uri, None)
+        if pending is not None:
+            pending.cancel()
+        self._pending_changes[uri] = asyncio.create_task(self._send_change_later(uri, delay))
+
+    async def _send_change_later(self, uri: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # No longer cancellable by a newer edit once sending starts
+        self._pending_changes.pop(uri, None)
+        await self._send_change(uri)
+
+    async def _flush_change(self, uri: str) -> None:
+        """Send a debounced didChange now, so requests see the latest text."""
+        pending = self._pending_changes.pop(uri, None)
+        if pending is not None:
+            pending.cancel()
+            await self._send_change(uri)
+
+    async def _send_change(self, uri: str) -> None:
+        doc = self._open_docs[uri]
+        doc["version"] += 1
         await self._notify("textDocument/didChange", {
             "textDocument": {
                 "uri": uri,
-                "version": version,
+                "version": doc["version"],
             },
-            "contentChanges": [{"text": text}],
+            "contentChanges": [{"text": doc["text"]}],
         })
 
     async def _ensure_open(self, path: str, text: Optional[str] = None) -> str:
         """Ensure a document is open and return its URI."""
-        file_path = Path(path)
-        if not file_path.is_absolute():
-            file_path = Path(self.root_path).resolve() / path
-        else:
-            file_path = file_path.resolve()
-
-        uri = file_path.as_uri()
-        
+        uri = self._path_to_uri(path)
         if uri not in self._open_docs:
-            await self.did_open(str(file_path), text)
+            await self.did_open(path, text)
+        else:
+            await self._flush_change(uri)
         
         return uri
 
+    async def wait_for_diagnostics(self, path: str, timeout: float) -> bool:
+        """Wait until the server publishes diagnostics for an open file.
+
+        Returns False if the file isn't open or nothing arrives in time.
+        """
+        event = self._diag_events.get(self._uri_to_path(self._path_to_uri(path)))
+        if event is None:
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
     def get_diagnostics(self, path: Optional[str] = None) -> list[Diagnostic]:
-        """Get diagnostics, optionally filtered by path."""
+        """Get diagnostics, optionally filtered by path.
+
+        The returned list is shared with the client; don't modify it.
+        """
         if path:
             return self._diagnostics.get(path, [])
         
-        all_diags = []
-        for diags in self._diagnostics.values():
-            all_diags.extend(diags)
-        return all_diags
+        if self._flat_diagnostics is None:
+            self._flat_diagnostics = list(chain.from_iterable(self._diagnostics.values()))
+        return self._flat_diagnostics
 
     async def shutdown(self) -> None:
         """Shutdown the language server."""
         if not self.process:
             return
 
+        for pending in self._pending_changes.values():
+            pending.cancel()
+        self._pending_changes.clear()
+
         try:
             if self._initialized:
                 await self._request("shutdown", None, timeout=5.0)
@@ -282,6 +352,14 @@ class LSPClient:
         except Exception:
             pass
 
+        if self._writer_task:
+            await self._flush_writes()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+
         if self._reader_task:
             self._reader_task.cancel()
             try:
@@ -340,15 +418,31 @@ class LSPClient:
         await self._send_message(message)
 
     async def _send_message(self, message: dict) -> None:
-        """Send a JSON-RPC message."""
+        """Queue a JSON-RPC message for the writer task."""
         if not self.process or not self.process.stdin:
             return
 
-        content = json.dumps(message)
-        header = f"Content-Length: {len(content)}\r\n\r\n"
-        
+        # Content-Length counts bytes of the UTF-8 body, not characters
+        content = fastjson.dumpb(message)
+        header = b"Content-Length: %d\r\n\r\n" % len(content)
+        # Kept as separate buffers: writelines() takes any number of them
+        self._tx_queue.extend((header, content))
+        self._tx_wake.set()
+
+    async def _write_messages(self) -> None:
+        """Write queued messages, everything queued since the last pass in one go."""
+        while True:
+            await self._tx_wake.wait()
+            self._tx_wake.clear()
+            await self._flush_writes()
+
+    async def _flush_writes(self) -> None:
+        if not self._tx_queue:
+            return
+        frames = list(self._tx_queue)
+        self._tx_queue.clear()
         try:
-            self.process.stdin.write(header.encode() + content.encode())
+            self.process.stdin.writelines(frames)
             await self.process.stdin.drain()
         except Exception as e:
             logger.error(f"Failed to send LSP message: {e}")
@@ -358,24 +452,24 @@ class LSPClient:
         if not self.process or not self.process.stdout:
             return
 
+        stdout = self.process.stdout
         try:
             while True:
-                header = await self._read_header()
-                if header is None:
-                    break
-
-                content_length = self._parse_content_length(header)
-                if content_length is None:
-                    continue
-
-                content = await self.process.stdout.read(content_length)
-                if not content:
+                # One await per header and per body, served from the
+                # StreamReader buffer; the body read never comes back short
+                try:
+                    header = await stdout.readuntil(b"\r\n\r\n")
+                    content_length = self._parse_content_length(header)
+                    if content_length is None:
+                        continue
+                    content = await stdout.readexactly(content_length)
+                except asyncio.IncompleteReadError:
                     break
 
                 try:
-                    message = json.loads(content.decode())
+                    message = fastjson.loads(content)
                     await self._handle_message(message)
-                except json.JSONDecodeError as e:
+                except fastjson.JSONDecodeError as e:
                     logger.warning(f"Invalid JSON from LSP server: {e}")
 
         except asyncio.CancelledError:
@@ -383,26 +477,12 @@ class LSPClient:
         except Exception as e:
             logger.error(f"LSP reader error: {e}")
 
-    async def _read_header(self) -> Optional[bytes]:
-        """Read the header section of a message."""
-        if not self.process or not self.process.stdout:
-            return None
-
-        header = b""
-        while True:
-            line = await self.process.stdout.readline()
-            if not line:
-                return None
-            header += line
-            if header.endswith(b"\r\n\r\n"):
-                return header
-
     def _parse_content_length(self, header: bytes) -> Optional[int]:
         """Parse Content-Length from header."""
-        for line in header.decode().split("\r\n"):
-            if line.lower().startswith("content-length:"):
+        for line in header.split(b"\r\n"):
+            if line[:15].lower() == b"content-length:":
                 try:
-                    return int(line.split(":", 1)[1].strip())
+                    return int(line[15:])
                 except ValueError:
                     return None
         return None
@@ -465,36 +545,41 @@ class LSPClient:
         diagnostics = params.get("diagnostics", [])
 
         path = self._uri_to_path(uri)
-        severity_map = {1: "error", 2: "warning", 3: "info", 4: "hint"}
+        if (
+            self.config.only_workspace_diagnostics
+            and path not in self._diag_events
+            and not self._in_workspace(path)
+        ):
+            return
 
-        self._diagnostics[path] = [
-            Diagnostic(
-                path=path,
-                line=d.get("range", {}).get("start", {}).get("line", 0) + 1,
-                column=d.get("range", {}).get("start", {}).get("character", 0) + 1,
-                message=d.get("message", ""),
-                severity=severity_map.get(d.get("severity", 4), "hint"),
-                source=d.get("source"),
-            )
-            for d in diagnostics
-        ]
+        # Publishes can carry thousands of entries; keep the loop lean
+        result = []
+        append = result.append
+        for d in diagnostics:
+            start = (d.get("range") or {}).get("start") or {}
+            append(Diagnostic(
+                path,
+                start.get("line", 0) + 1,
+                start.get("character", 0) + 1,
+                d.get("message", ""),
+                _SEVERITY.get(d.get("severity", 4), "hint"),
+                d.get("source"),
+            ))
+        self._diagnostics_count += len(result) - len(self._diagnostics.get(path, ()))
+        self._diagnostics[path] = result
+        self._flat_diagnostics = None
+        self.diagnostics_generation += 1
+        event = self._diag_events.get(path)
+        if event is not None:
+            event.set()
+
+    def _in_workspace(self, path: str) -> bool:
+        """Whether an absolute path lies under the workspace root."""
+        return path.startswith(self._workspace_prefix)
 
     def _get_language_id(self, path: str) -> str:
         """Get the language ID for a file path."""
-        ext_map = {
-            ".py": "python",
-            ".pyi": "python",
-            ".ts": "typescript",
-            ".tsx": "typescriptreact",
-            ".js": "javascript",
-            ".jsx": "javascriptreact",
-            ".rs": "rust",
-            ".go": "go",
-        }
-        for ext, lang in ext_map.items():
-            if path.endswith(ext):
-                return lang
-        return "plaintext"
+        return LANGUAGE_IDS.get(os.path.splitext(path)[1], "plaintext")
 
     def _parse_location(self, loc: dict) -> Optional[Location]:
         """Parse an LSP Location to our Location type."""
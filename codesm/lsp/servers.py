@@ -1,5 +1,6 @@
 """LSP server configurations"""
 
+import os
 from dataclasses import dataclass, field
 
 
@@ -11,6 +12,11 @@ class ServerConfig:
     root_uri_required: bool = True
     priority: int = 0
     root_markers: list[str] = field(default_factory=list)
+    # Coalesce didChange notifications sent within this window (0 sends each)
+    debounce_ms: int = 120
+    # Ignore diagnostics the server publishes for files outside the
+    # workspace (site-packages, stubs) unless they were opened
+    only_workspace_diagnostics: bool = True
 
 
 SERVERS: dict[str, ServerConfig] = {
@@ -232,16 +238,21 @@ LANGUAGE_IDS: dict[str, str] = {
 }
 
 
+def _build_extension_index() -> dict[str, tuple[str, ...]]:
+    """Map each extension to the server keys claiming it, by priority"""
+    index: dict[str, list[str]] = {}
+    for key, config in sorted(SERVERS.items(), key=lambda item: item[1].priority):
+        for ext in config.file_extensions:
+            index.setdefault(ext, []).append(key)
+    return {ext: tuple(keys) for ext, keys in index.items()}
+
+
+_EXT_INDEX = _build_extension_index()
+
+
 def get_servers_for_file(path: str) -> list[str]:
     """Get all matching server keys for a given file path, sorted by priority."""
-    matching = []
-    for key, config in SERVERS.items():
-        for ext in config.file_extensions:
-            if path.endswith(ext):
-                matching.append((config.priority, key))
-                break
-    matching.sort(key=lambda x: x[0])
-    return [key for _, key in matching]
+    return list(_EXT_INDEX.get(os.path.splitext(path)[1], ()))
 
 
 def get_server_for_file(path: str) -> str | None:
@@ -14,9 +14,9 @@ The "code execution with MCP" pattern allows agents to:
 """
 
 from .client import MCPClient, MCPServerConfig
-from .manager import MCPManager, get_mcp_manager
+from .manager import MCPManager, ConnectResult, get_mcp_manager
 from .tool import MCPTool, MCPResourceTool
-from .config import load_mcp_config, create_example_config
+from .config import find_mcp_config, load_mcp_config, create_example_config
 from .sandbox import MCPSandbox, SkillsManager, ExecutionResult
 from .codegen import generate_all_stubs, generate_tool_tree
 
@@ -25,11 +25,13 @@ __all__ = [
     "MCPClient",
     "MCPServerConfig", 
     "MCPManager",
+    "ConnectResult",
     "get_mcp_manager",
     # Tools
     "MCPTool",
     "MCPResourceTool",
     # Config
+    "find_mcp_config",
     "load_mcp_config",
     "create_example_config",
     # Code execution
@@ -1,14 +1,48 @@
 """MCP configuration loading utilities"""
 
+import functools
 import json
 import logging
 from pathlib import Path
 from typing import Any
 
+from pydantic import TypeAdapter, ValidationError
+
 from .client import MCPServerConfig
 
 logger = logging.getLogger(__name__)
 
+# MCP config files looked up relative to a working directory, in order
+MCP_CONFIG_CANDIDATES = ("mcp-servers.json", ".mcp/servers.json", "codesm.json")
+
+
+@functools.lru_cache(maxsize=32)
+def _find_project_config(directory: Path) -> Path | None:
+    return next(
+        (path for path in (directory / name for name in MCP_CONFIG_CANDIDATES) if path.is_file()),
+        None,
+    )
+
+
+def find_mcp_config(directory: Path, user_fallback: bool = False) -> Path | None:
+    """Return the first MCP config file in directory (cached per directory).
+    
+    With user_fallback, ~/.config/codesm/mcp.json is returned when the
+    directory has none.
+    """
+    found = _find_project_config(Path(directory))
+    if found is None and user_fallback:
+        user_config = Path.home() / ".config" / "codesm" / "mcp.json"
+        if user_config.is_file():
+            return user_config
+    return found
+
+
+@functools.cache
+def _servers_adapter() -> TypeAdapter[list[MCPServerConfig]]:
+    """Validator for a whole batch of server configs, compiled on first use"""
+    return TypeAdapter(list[MCPServerConfig])
+
 
 def load_mcp_config(config_path: Path | str | None = None) -> dict[str, MCPServerConfig]:
     """Load MCP server configurations from a JSON file.
@@ -81,7 +115,7 @@ def _parse_mcp_config(config: dict[str, Any]) -> dict[str, MCPServerConfig]:
     if not mcp_config:
         return servers
     
-    # Parse each server
+    entries = []
     for name, server_config in mcp_config.items():
         if not isinstance(server_config, dict):
             continue
@@ -91,17 +125,20 @@ def _parse_mcp_config(config: dict[str, Any]) -> dict[str, MCPServerConfig]:
             logger.warning(f"MCP server '{name}' has no command, skipping")
             continue
         
+        entries.append({**server_config, "name": name})
+    
+    # Validate everything in one pass; only if some entry is invalid, redo it
+    # per server so the bad one is skipped instead of dropping the rest
+    try:
+        return {config.name: config for config in _servers_adapter().validate_python(entries)}
+    except ValidationError:
+        pass
+    
+    for entry in entries:
         try:
-            servers[name] = MCPServerConfig(
-                name=name,
-                command=server_config["command"],
-                args=server_config.get("args", []),
-                env=server_config.get("env", {}),
-                transport=server_config.get("transport", "stdio"),
-                url=server_config.get("url"),
-            )
-        except Exception as e:
-            logger.warning(f"Failed to parse MCP server '{name}': {e}")
+            servers[entry["name"]] = MCPServerConfig.model_validate(entry)
+        except ValidationError as e:
+            logger.warning(f"Failed to parse MCP server '{entry['name']}': {e}")
     
     return servers
 
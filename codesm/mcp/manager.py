@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
@@ -12,6 +13,22 @@ from ..tool.base import Tool
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ConnectResult:
+    """Outcome of connecting to one MCP server"""
+    
+    success: bool
+    n_tools: int = 0
+    n_resources: int = 0
+    
+    def __bool__(self) -> bool:
+        return self.success
+    
+    @classmethod
+    def from_client(cls, client: MCPClient) -> "ConnectResult":
+        return cls(True, len(client.tools), len(client.resources))
+
+
 class MCPManager:
     """Manages connections to multiple MCP servers"""
     
@@ -19,6 +36,13 @@ class MCPManager:
         self._clients: dict[str, MCPClient] = {}
         self._tools: list[Tool] = []
         self._configs: list[MCPServerConfig] = []
+        # Bumped whenever the registered tool list changes
+        self._version = 0
+    
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever the set of MCP tools changes"""
+        return self._version
     
     def add_server(self, config: MCPServerConfig):
         """Add an MCP server configuration"""
@@ -37,23 +61,38 @@ class MCPManager:
             )
             self.add_server(server_config)
     
-    async def connect_all(self) -> dict[str, bool]:
-        """Connect to all configured MCP servers"""
-        results = {}
+    async def connect_all(self) -> dict[str, ConnectResult]:
+        """Connect to all configured MCP servers concurrently.
         
+        Startup takes as long as the slowest server rather than the sum of
+        all of them. MCPClient.connect() reports failures (including its own
+        initialization timeout) as False, so one bad server never cancels
+        the others. Each result is truthy on success and carries the
+        server's tool/resource counts, so callers need not inspect clients.
+        """
+        pending: dict[str, tuple[MCPClient, asyncio.Task]] = {}
+        
+        async with asyncio.TaskGroup() as tg:
+            for config in self._configs:
+                if config.name in self._clients or config.name in pending:
+                    continue
+                client = MCPClient(config)
+                pending[config.name] = (client, tg.create_task(client.connect()))
+        
+        # Register in config order so the tool list is deterministic
+        results = {}
         for config in self._configs:
-            if config.name in self._clients:
-                results[config.name] = True
+            if config.name not in pending:
+                results[config.name] = ConnectResult.from_client(self._clients[config.name])
                 continue
             
-            client = MCPClient(config)
-            success = await client.connect()
-            
-            if success:
+            client, task = pending.pop(config.name)
+            if task.result():
                 self._clients[config.name] = client
                 self._register_tools(client)
-            
-            results[config.name] = success
+                results[config.name] = ConnectResult.from_client(client)
+            else:
+                results[config.name] = ConnectResult(False)
         
         return results
     
@@ -83,6 +122,7 @@ class MCPManager:
         
         self._clients.clear()
         self._tools.clear()
+        self._version += 1
     
     async def disconnect_server(self, name: str):
         """Disconnect from a specific MCP server"""
@@ -95,6 +135,7 @@ class MCPManager:
                 t for t in self._tools 
                 if not t.name.startswith(f"mcp_{name}_")
             ]
+            self._version += 1
     
     def _register_tools(self, client: MCPClient):
         """Register tools from an MCP client"""
@@ -107,6 +148,8 @@ class MCPManager:
         if client.resources:
             resource_tool = MCPResourceTool(client.config.name, client)
             self._tools.append(resource_tool)
+        
+        self._version += 1
     
     def get_tools(self) -> list[Tool]:
         """Get all tools from connected MCP servers"""
@@ -44,18 +44,8 @@ class AnthropicProvider(Provider):
             }
         
         elif creds.get("auth_type") == "oauth":
-            # Check if token is expired and refresh if needed
-            if self.oauth.is_token_expired():
-                refresh_token = creds.get("refresh_token")
-                if refresh_token:
-                    result = await self.oauth.refresh_token(refresh_token)
-                    if not result["success"]:
-                        raise ValueError(f"Failed to refresh OAuth token: {result.get('error')}")
-                    creds = self.oauth.get_credentials()
-                else:
-                    raise ValueError("OAuth token expired and no refresh token available")
-            
-            access_token = creds.get("access_token")
+            # Refreshes an expired token (once, even with concurrent requests)
+            access_token = await self.oauth.get_valid_access_token()
             return {
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {access_token}",
@@ -151,7 +141,7 @@ class AnthropicProvider(Provider):
     
     async def stream(
         self,
-        system: str,
+        system: str | list[dict],
         messages: list[dict],
         tools: list[dict] | None = None,
     ) -> AsyncIterator[StreamChunk]:
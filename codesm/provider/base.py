@@ -5,7 +5,7 @@ from dataclasses import dataclass, field
 from typing import AsyncIterator, Literal
 
 
-@dataclass
+@dataclass(slots=True)
 class StreamChunk:
     """A chunk of streamed response from an LLM"""
     type: Literal["text", "tool_call", "tool_call_delta", "tool_result", "handoff", "thinking", "thinking_done", "subagent_start", "subagent_done"]
@@ -20,6 +20,34 @@ class StreamChunk:
     # For subagent events
     subagent_type: str = ""
     subagent_id: str = ""
+    
+    def reset(self, type: str, content: str = "", name: str = "", id: str = "") -> "StreamChunk":
+        """Reassign the chunk in place so a single instance can be re-yielded.
+        
+        Fields not given are restored to their defaults.
+        """
+        self.type = type
+        self.content = content
+        self.name = name
+        self.id = id
+        if self.args:
+            self.args = {}
+        self.new_session_id = ""
+        self.thinking_summary = ""
+        self.subagent_type = ""
+        self.subagent_id = ""
+        return self
+
+
+def system_text(system: str | list[dict]) -> str:
+    """Flatten a system prompt given as content blocks into plain text.
+    
+    Providers without support for structured system content (and prompt
+    cache breakpoints) use this to send the prompt as a single string.
+    """
+    if isinstance(system, str):
+        return system
+    return "\n\n".join(block.get("text", "") for block in system)
 
 
 class Provider(ABC):
@@ -28,11 +56,15 @@ class Provider(ABC):
     @abstractmethod
     async def stream(
         self,
-        system: str,
+        system: str | list[dict],
         messages: list[dict],
         tools: list[dict] | None = None,
     ) -> AsyncIterator[StreamChunk]:
-        """Stream a response from the model"""
+        """Stream a response from the model.
+        
+        ``system`` is either a plain string or a list of text content blocks,
+        optionally carrying ``cache_control`` breakpoints.
+        """
         pass
 
 
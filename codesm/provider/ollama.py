@@ -12,7 +12,7 @@ except ImportError:
     OLLAMA_AVAILABLE = False
     AsyncClient = None
 
-from .base import Provider, StreamChunk
+from .base import Provider, StreamChunk, system_text
 
 logger = logging.getLogger(__name__)
 
@@ -47,9 +47,9 @@ class OllamaProvider(Provider):
             for t in tools
         ]
     
-    def _convert_messages(self, system: str, messages: list[dict]) -> list[dict]:
+    def _convert_messages(self, system: str | list[dict], messages: list[dict]) -> list[dict]:
         """Convert internal message format to Ollama format"""
-        full_messages = [{"role": "system", "content": system}]
+        full_messages = [{"role": "system", "content": system_text(system)}]
         
         for msg in messages:
             role = msg.get("role")
@@ -81,7 +81,7 @@ class OllamaProvider(Provider):
     
     async def stream(
         self,
-        system: str,
+        system: str | list[dict],
         messages: list[dict],
         tools: list[dict] | None = None,
     ) -> AsyncIterator[StreamChunk]:
@@ -6,7 +6,7 @@ import os
 import logging
 import openai
 
-from .base import Provider, StreamChunk
+from .base import Provider, StreamChunk, system_text
 from codesm.auth.credentials import CredentialStore
 
 logger = logging.getLogger(__name__)
@@ -53,7 +53,7 @@ class OpenAIProvider(Provider):
     
     async def stream(
         self,
-        system: str,
+        system: str | list[dict],
         messages: list[dict],
         tools: list[dict] | None = None,
     ) -> AsyncIterator[StreamChunk]:
@@ -63,7 +63,7 @@ class OpenAIProvider(Provider):
         logger.debug(f"Messages count: {len(messages)}, Tools: {len(tools) if tools else 0}")
 
         # Build messages with system prompt
-        full_messages = [{"role": "system", "content": system}]
+        full_messages = [{"role": "system", "content": system_text(system)}]
         
         for msg in messages:
             role = msg.get("role")
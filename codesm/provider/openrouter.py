@@ -7,7 +7,7 @@ import logging
 import time
 import openai
 
-from .base import Provider, StreamChunk
+from .base import Provider, StreamChunk, system_text
 from codesm.auth.credentials import CredentialStore
 
 logger = logging.getLogger(__name__)
@@ -67,7 +67,7 @@ class OpenRouterProvider(Provider):
     
     async def stream(
         self,
-        system: str,
+        system: str | list[dict],
         messages: list[dict],
         tools: list[dict] | None = None,
     ) -> AsyncIterator[StreamChunk]:
@@ -76,7 +76,8 @@ class OpenRouterProvider(Provider):
         logger.info(f"Making OpenRouter API call with model: {self.model}")
         logger.debug(f"Messages count: {len(messages)}, Tools: {len(tools) if tools else 0}")
 
-        # Build messages with system prompt
+        # Build messages with system prompt (content blocks are passed through
+        # so cache_control breakpoints reach providers that support them)
         full_messages = [{"role": "system", "content": system}]
         
         for msg in messages:
@@ -186,8 +187,8 @@ class OpenRouterProvider(Provider):
             from codesm.agent.optimizer import record_usage
             
             # Estimate input tokens from messages
-            input_text = system + " ".join(
-                m.get("content", "") for m in full_messages if m.get("content")
+            input_text = system_text(system) + " ".join(
+                m["content"] for m in full_messages[1:] if isinstance(m.get("content"), str)
             )
             input_tokens = _estimate_tokens(input_text)
             output_tokens = _estimate_tokens(output_text)
@@ -26,12 +26,15 @@ async def chat(request: ChatRequest, directory: str = "."):
     agent = Agent(directory=Path(directory), model=request.model)
     
     async def stream():
-        async for chunk in agent.chat(request.message):
-            # chunk is a StreamChunk object, extract the content
-            if hasattr(chunk, 'content'):
-                yield chunk.content
-            else:
-                yield str(chunk)
+        try:
+            async for chunk in agent.chat(request.message):
+                # chunk is a StreamChunk object, extract the content
+                if hasattr(chunk, 'content'):
+                    yield chunk.content
+                else:
+                    yield str(chunk)
+        finally:
+            await agent.cleanup()
     
     return StreamingResponse(stream(), media_type="text/plain")
 
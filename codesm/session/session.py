@@ -2,6 +2,7 @@
 
 import asyncio
 import json
+import threading
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -35,6 +36,14 @@ class Session:
     _snapshot: Optional["Snapshot"] = field(default=None, repr=False)
     _current_snapshot_hash: Optional[str] = field(default=None, repr=False)
     _undo_history: Optional[UndoHistory] = field(default=None, repr=False)
+    # Incrementally maintained result of get_messages()
+    _llm_messages: list[dict] = field(default_factory=list, repr=False, compare=False)
+    _llm_source: Optional[list] = field(default=None, repr=False, compare=False)
+    _llm_scanned: int = field(default=0, repr=False, compare=False)
+    # Orders writes of the session file from the loop and from worker threads
+    _save_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _save_seq: int = field(default=0, repr=False, compare=False)
+    _written_seq: int = field(default=0, repr=False, compare=False)
     
     @classmethod
     def create(cls, directory: Path, is_child: bool = False) -> "Session":
@@ -115,14 +124,15 @@ class Session:
                 })
         return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
     
-    def save(self):
-        """Save session to storage"""
+    def _save_data(self) -> tuple[int, dict]:
+        """Snapshot the session for saving, numbered in snapshot order"""
         self.updated_at = datetime.now()
         data = {
             "id": self.id,
             "directory": str(self.directory),
             "title": self.title,
-            "messages": self.messages,
+            # Copied so a write in another thread never sees later appends
+            "messages": list(self.messages),
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
         }
@@ -133,10 +143,31 @@ class Session:
             data["branch_point"] = self.branch_point
         if self.branch_name:
             data["branch_name"] = self.branch_name
-        Storage.write(["session", self.id], data)
+        self._save_seq += 1
+        return self._save_seq, data
+    
+    def _write(self, seq: int, data: dict):
+        with self._save_lock:
+            # A newer snapshot already reached the disk first
+            if seq < self._written_seq:
+                return
+            Storage.write(["session", self.id], data)
+            self._written_seq = seq
+    
+    def save(self):
+        """Save session to storage"""
+        self._write(*self._save_data())
+    
+    async def save_async(self):
+        """Save session to storage, writing the file from a worker thread"""
+        await asyncio.to_thread(self._write, *self._save_data())
     
-    def add_message(self, role: str, content: str | None = None, **kwargs):
-        """Add a message to the session, preserving all metadata"""
+    def add_message(self, role: str, content: str | None = None, persist: bool = True, **kwargs):
+        """Add a message to the session, preserving all metadata.
+        
+        With persist=False the message is only appended in memory; the caller
+        is responsible for calling save() (used to batch writes).
+        """
         msg = {"role": role}
         if content is not None:
             msg["content"] = content
@@ -150,7 +181,8 @@ class Session:
                 self.title = generate_title_sync(content)
             self._title_generated = True
         
-        self.save()
+        if persist:
+            self.save()
         
         # Auto-index topics after a few messages (async, non-blocking)
         user_count = sum(1 for m in self.messages if m.get("role") == "user")
@@ -159,17 +191,31 @@ class Session:
             asyncio.create_task(self._auto_index_topics())
     
     def get_messages(self) -> list[dict]:
-        """Get all messages for LLM context (user/assistant only, no tool messages)"""
+        """Get all messages for LLM context (user/assistant only, no tool messages).
+        
+        The filtered list is kept in memory and only extended with messages
+        added since the last call, so this is O(new messages) per turn. The
+        returned list is shared; callers must not mutate it.
+        """
+        messages = self.messages
+        # Rebuild if the history was replaced (clear, revert) or truncated
+        if self._llm_source is not messages or self._llm_scanned > len(messages):
+            self._llm_messages = []
+            self._llm_source = messages
+            self._llm_scanned = 0
+        
         # Filter out tool messages - they're ephemeral within a turn
         # Also filter out assistant messages with tool_calls (intermediate steps)
-        result = []
-        for m in self.messages:
+        result = self._llm_messages
+        for i in range(self._llm_scanned, len(messages)):
+            m = messages[i]
             role = m.get("role")
             if role == "tool":
                 continue
             if role == "assistant" and m.get("tool_calls"):
                 continue
             result.append(m)
+        self._llm_scanned = len(messages)
         return result
     
     def get_messages_for_display(self) -> list[dict]:
@@ -216,7 +262,7 @@ class Session:
             if title and title != self.title:
                 self.title = title
                 self._title_generated = True
-                self.save()
+                await self.save_async()
         except Exception:
             # Fallback already handled in generate_title_async
             pass
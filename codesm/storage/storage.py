@@ -1,6 +1,8 @@
 """File-based storage"""
 
 import json
+import os
+import tempfile
 from pathlib import Path
 from typing import Any
 
@@ -17,7 +19,16 @@ class Storage:
         """Write data to storage"""
         path = cls._key_to_path(key)
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(data, indent=2, default=str))
+        # Write a temp file and swap it in, so readers and concurrent writers
+        # never see a truncated or interleaved file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(data, indent=2, default=str))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
     
     @classmethod
     def read(cls, key: list[str]) -> Any | None:
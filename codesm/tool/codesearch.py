@@ -21,7 +21,8 @@ class CodeSearchTool(Tool):
     description = "Semantic code search - find code by meaning, not just keywords."
     
     _client = None
-    _index_cache: dict[str, list[dict]] = {}
+    # cache key -> (chunk metadata, embedding matrix with row i for chunk i)
+    _index_cache: dict[str, tuple[list[dict], "np.ndarray"]] = {}
     
     @classmethod
     def _get_cache_path(cls, cache_key: str) -> Path:
@@ -41,9 +42,8 @@ class CodeSearchTool(Tool):
         return hashlib.md5("\n".join(mtimes).encode()).hexdigest()
     
     @classmethod
-    def _load_disk_cache(cls, cache_key: str, files_hash: str) -> Optional[list[dict]]:
-        """Load cached embeddings from disk if valid"""
-        import numpy as np
+    def _load_disk_cache(cls, cache_key: str, files_hash: str) -> Optional[tuple[list[dict], "np.ndarray"]]:
+        """Load cached chunks and embedding matrix from disk if valid"""
         cache_path = cls._get_cache_path(cache_key)
         if not cache_path.exists():
             return None
@@ -52,26 +52,24 @@ class CodeSearchTool(Tool):
                 data = pickle.load(f)
             if data.get("files_hash") != files_hash:
                 return None  # Files changed, invalidate cache
-            # Convert embeddings back to numpy arrays
-            for chunk in data["chunks"]:
-                chunk["embedding"] = np.array(chunk["embedding"])
-            return data["chunks"]
+            if "emb" not in data:
+                return None  # Older per-chunk embedding layout
+            return data["meta"], data["emb"]
         except Exception:
             return None
     
     @classmethod
-    def _save_disk_cache(cls, cache_key: str, files_hash: str, chunks: list[dict]):
-        """Save embeddings to disk cache"""
+    def _save_disk_cache(cls, cache_key: str, files_hash: str, chunks: list[dict], embeddings: "np.ndarray"):
+        """Save chunks and embedding matrix to disk cache"""
         cache_path = cls._get_cache_path(cache_key)
         try:
-            # Convert numpy arrays to lists for pickling
-            chunks_to_save = []
-            for chunk in chunks:
-                chunk_copy = chunk.copy()
-                chunk_copy["embedding"] = chunk["embedding"].tolist()
-                chunks_to_save.append(chunk_copy)
+            # The matrix pickles as one buffer, not a float list per chunk
             with open(cache_path, "wb") as f:
-                pickle.dump({"files_hash": files_hash, "chunks": chunks_to_save}, f)
+                pickle.dump(
+                    {"files_hash": files_hash, "meta": chunks, "emb": embeddings},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
         except Exception:
             pass  # Silently fail on cache write errors
     
@@ -236,7 +234,7 @@ class CodeSearchTool(Tool):
         key = f"{root}:{pattern or '*'}"
         return hashlib.md5(key.encode()).hexdigest()
     
-    async def _build_index(self, root: Path, pattern: Optional[str]) -> list[dict]:
+    async def _build_index(self, root: Path, pattern: Optional[str]) -> tuple[list[dict], "np.ndarray | None"]:
         """Build or load cached embedding index"""
         import numpy as np
         
@@ -249,7 +247,7 @@ class CodeSearchTool(Tool):
         # Get all code files
         files = self._get_code_files(root, pattern)
         if not files:
-            return []
+            return [], None
         
         # Check disk cache (with file hash for invalidation)
         files_hash = self._get_file_hash(files)
@@ -269,26 +267,22 @@ class CodeSearchTool(Tool):
                 continue
         
         if not all_chunks:
-            return []
+            return [], None
         
         # Generate embeddings
         texts = [c["content"] for c in all_chunks]
         embeddings_list = await self._get_embeddings(texts)
-        embeddings = np.array(embeddings_list)
+        # float32, C-contiguous: scoring is then a single BLAS sgemv
+        embeddings = np.array(embeddings_list, dtype=np.float32)
         
         # Normalize embeddings for cosine similarity
-        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-        embeddings = embeddings / norms
-        
-        # Add embeddings to chunks
-        for i, chunk in enumerate(all_chunks):
-            chunk["embedding"] = embeddings[i]
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
         
         # Cache in memory and on disk
-        self._index_cache[cache_key] = all_chunks
-        self._save_disk_cache(cache_key, files_hash, all_chunks)
+        self._index_cache[cache_key] = (all_chunks, embeddings)
+        self._save_disk_cache(cache_key, files_hash, all_chunks, embeddings)
         
-        return all_chunks
+        return all_chunks, embeddings
     
     async def execute(self, args: dict, context: dict) -> str:
         query = args["query"]
@@ -341,19 +335,16 @@ class CodeSearchTool(Tool):
         """Fallback search with custom file pattern - uses legacy on-demand indexing"""
         import numpy as np
         
-        index = await self._build_index(root, pattern)
+        index, embeddings = await self._build_index(root, pattern)
         if not index:
             return []
         
         query_embeddings = await self._get_embeddings([query])
-        query_embedding = np.array(query_embeddings[0])
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
-        
-        similarities = []
-        for chunk in index:
-            sim = float(np.dot(query_embedding, chunk["embedding"]))
-            similarities.append((sim, chunk))
+        # Same dtype as the matrix; a float64 query would upcast every row
+        query_embedding = np.array(query_embeddings[0], dtype=np.float32)
+        query_embedding /= np.linalg.norm(query_embedding)
         
+        similarities = list(zip((embeddings @ query_embedding).tolist(), index))
         similarities.sort(key=lambda x: x[0], reverse=True)
         
         results = []
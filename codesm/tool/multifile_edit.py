@@ -245,12 +245,10 @@ class MultiFileEditTool(Tool):
                 output += f"\n\n... and {len(diff_parts) - 5} more file(s)"
         
         # Format files if formatter available
-        format_msgs = []
-        for edit in prepared_edits:
-            if edit["operation"] != "delete":
-                msg = await self._format_file(Path(edit["path"]), session)
-                if msg:
-                    format_msgs.append(f"{Path(edit['path']).name}: {msg}")
+        format_msgs = await self._format_files(
+            [Path(edit["path"]) for edit in prepared_edits if edit["operation"] != "delete"],
+            session,
+        )
         
         if format_msgs:
             output += "\n\n" + "\n".join(format_msgs)
@@ -315,17 +313,20 @@ class MultiFileEditTool(Tool):
         
         return "```diff\n" + "\n".join(diff_lines) + "\n```"
     
-    async def _format_file(self, path: Path, session) -> str:
-        """Format file if formatter is available and enabled."""
+    async def _format_files(self, paths: list[Path], session) -> list[str]:
+        """Format files if a formatter is available and enabled, one run per formatter."""
         try:
-            from codesm.formatter import format_file_if_enabled
+            from codesm.formatter import format_files_if_enabled
             session_id = session.id if session else None
-            result = await format_file_if_enabled(path, session_id)
-            
+            results = await format_files_if_enabled(paths, session_id)
+        except Exception:
+            return []
+        
+        msgs = []
+        for path in paths:
+            result = (results or {}).get(path)
             if result and result.formatted:
-                return f"✨ Formatted with {result.formatter}"
+                msgs.append(f"{path.name}: ✨ Formatted with {result.formatter}")
             elif result and not result.success and result.error:
-                return f"⚠️ Format failed: {result.error}"
-            return ""
-        except Exception:
-            return ""
+                msgs.append(f"{path.name}: ⚠️ Format failed: {result.error}")
+        return msgs
@@ -16,6 +16,11 @@ class ToolRegistry:
     def __init__(self):
         self._tools: dict[str, Tool] = {}
         self._mcp_manager: "MCPManager | None" = None
+        # Bumped whenever the set of tools changes; get_schemas() rebuilds
+        # its cached list only when this (or the MCP manager's) version moves
+        self._version = 0
+        self._schemas_cache: list[dict] | None = None
+        self._schemas_version: tuple[int, int] | None = None
         self._register_defaults()
     
     def _register_defaults(self):
@@ -120,6 +125,7 @@ class ToolRegistry:
     def register(self, tool: Tool):
         """Register a tool"""
         self._tools[tool.name] = tool
+        self._version += 1
     
     def set_mcp_manager(self, manager: "MCPManager", workspace_dir=None):
         """Set the MCP manager for MCP tool integration"""
@@ -135,6 +141,7 @@ class ToolRegistry:
         self._tools[mcp_execute.name] = mcp_execute
         self._tools[mcp_tools.name] = mcp_tools
         self._tools[mcp_skills.name] = mcp_skills
+        self._version += 1
         
         logger.info("Registered MCP code execution tools: mcp_execute, mcp_tools, mcp_skills")
     
@@ -152,7 +159,15 @@ class ToolRegistry:
         return None
     
     def get_schemas(self) -> list[dict]:
-        """Get all tool schemas for LLM (includes MCP tools)"""
+        """Get all tool schemas for LLM (includes MCP tools).
+        
+        The list is cached until a tool is registered or the MCP manager's
+        tools change; callers must treat it as read-only.
+        """
+        version = (self._version, self._mcp_manager.version if self._mcp_manager else 0)
+        if self._schemas_cache is not None and self._schemas_version == version:
+            return self._schemas_cache
+        
         schemas = [
             {
                 "name": tool.name,
@@ -171,6 +186,8 @@ class ToolRegistry:
                     "parameters": tool.get_parameters_schema(),
                 })
         
+        self._schemas_cache = schemas
+        self._schemas_version = version
         return schemas
     
     async def execute(self, name: str, args: dict, context: dict) -> str:
@@ -204,6 +221,11 @@ class ToolRegistry:
         Returns:
             List of (tool_call_id, tool_name, result)
         """
+        # A single call (the common case) needs no task scheduling
+        if len(tool_calls) == 1:
+            call_id, name, args = tool_calls[0]
+            return [(call_id, name, await self.execute(name, args, context))]
+        
         async def execute_one(call_id: str, name: str, args: dict) -> tuple[str, str, str]:
             result = await self.execute(name, args, context)
             return (call_id, name, result)
@@ -415,6 +415,10 @@ class CodesmApp(App):
         # Stop file watcher
         if self._file_watcher:
             await self._file_watcher.stop()
+        
+        # Close pooled auth connections
+        from codesm.auth.claude_oauth import aclose_client
+        await aclose_client()
 
     async def on_mount(self):
         """Initialize when app mounts"""
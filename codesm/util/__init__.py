@@ -9,6 +9,7 @@ from .citations import (
     format_grep_output,
     format_file_list,
 )
+from . import fastjson
 
 __all__ = [
     "file_link",
@@ -18,4 +19,5 @@ __all__ = [
     "convert_paths_to_links",
     "format_grep_output",
     "format_file_list",
+    "fastjson",
 ]
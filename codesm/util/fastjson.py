@@ -0,0 +1,38 @@
+"""JSON helpers that use orjson when it is installed"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch this one exception type regardless of the backend
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a compact JSON string"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumpb(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 bytes, optionally indented by two spaces (for files)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse a JSON document from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,71 @@
+"""Tests for the agent's session persistence"""
+
+import asyncio
+import contextlib
+
+import pytest
+
+from codesm.agent.agent import Agent
+from codesm.provider.base import StreamChunk
+from codesm.session.session import Session
+from codesm.storage.storage import Storage
+
+
+class ScriptedLoop:
+    """Stands in for the ReAct loop, yielding fixed chunks"""
+
+    def __init__(self, chunks: list[StreamChunk], then_stall: bool = False):
+        self.chunks = chunks
+        self.then_stall = then_stall
+
+    async def execute(self, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+        if self.then_stall:
+            await asyncio.sleep(60)
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setenv("CODESM_NO_MCP", "1")
+    session = Session(id="session_test", directory=tmp_path)
+    return Agent(directory=tmp_path, model="anthropic/claude-sonnet-4-20250514", session=session)
+
+
+def stored_session() -> dict:
+    return Storage.read(["session", "session_test"])
+
+
+class TestPersistence:
+    async def test_messages_saved_when_turn_ends(self, agent):
+        agent.react_loop = ScriptedLoop([
+            StreamChunk(type="tool_result", name="bash", content="ok", id="call_1"),
+            StreamChunk(type="text", content="Done."),
+        ])
+
+        async for _ in agent.chat("run it"):
+            pass
+
+        messages = stored_session()["messages"]
+        assert [(m["role"], m.get("content")) for m in messages] == [
+            ("user", "run it"),
+            ("tool_display", "ok"),
+            ("assistant", "Done."),
+        ]
+        await agent.cleanup()
+
+    async def test_queued_messages_saved_when_stream_abandoned(self, agent):
+        agent.react_loop = ScriptedLoop(
+            [StreamChunk(type="tool_result", name="bash", content="ok", id="call_1")],
+            then_stall=True,
+        )
+
+        turn = agent.chat("run it")
+        async with contextlib.aclosing(turn):
+            async for chunk in turn:
+                if chunk.type == "tool_result":
+                    break
+
+        roles = [m["role"] for m in stored_session()["messages"]]
+        assert roles == ["user", "tool_display"]
+        await agent.cleanup()
@@ -0,0 +1,110 @@
+"""Tests for Claude OAuth credential handling"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from codesm.auth.claude_oauth import ClaudeOAuth
+from codesm.auth.credentials import CredentialStore
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """Keep credentials.json (and its parsed cache) out of the real home"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(CredentialStore, "_cache", {})
+    return tmp_path
+
+
+def write_credentials(home, anthropic: dict):
+    """Rewrite credentials.json as another process would"""
+    path = home / ".config" / "codesm" / "credentials.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"anthropic": anthropic}))
+    # Make sure the mtime moves even on coarse-grained file systems
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class TestTokenRefresh:
+    async def test_concurrent_callers_share_one_refresh(self, home, monkeypatch):
+        write_credentials(home, {
+            "auth_type": "oauth",
+            "access_token": "old",
+            "refresh_token": "refresh-1",
+            "expires_at_ns": time.time_ns() - 1,
+        })
+        calls = []
+
+        async def refresh_token(self, refresh_token):
+            calls.append(refresh_token)
+            await asyncio.sleep(0.05)
+            token_data = {"access_token": "new", "refresh_token": "refresh-2", "expires_in": 3600}
+            self._save_credentials(token_data)
+            return {"success": True, "data": token_data}
+
+        monkeypatch.setattr(ClaudeOAuth, "refresh_token", refresh_token)
+
+        # Separate instances, like the main agent and a subagent
+        tokens = await asyncio.gather(
+            ClaudeOAuth().get_valid_access_token(),
+            ClaudeOAuth().get_valid_access_token(),
+        )
+        assert tokens == ["new", "new"]
+        assert calls == ["refresh-1"]
+
+    async def test_failed_refresh_raises(self, home, monkeypatch):
+        write_credentials(home, {
+            "auth_type": "oauth",
+            "access_token": "old",
+            "refresh_token": "refresh-1",
+            "expires_at_ns": time.time_ns() - 1,
+        })
+
+        async def refresh_token(self, refresh_token):
+            return {"success": False, "error": "invalid_grant"}
+
+        monkeypatch.setattr(ClaudeOAuth, "refresh_token", refresh_token)
+        with pytest.raises(ValueError, match="invalid_grant"):
+            await ClaudeOAuth().get_valid_access_token()
+
+
+class TestCredentialSync:
+    def test_external_rewrite_is_picked_up(self, home):
+        oauth = ClaudeOAuth()
+        oauth.save_api_key("key-one")
+        assert oauth.get_api_key() == "key-one"
+
+        write_credentials(home, {"auth_type": "api_key", "api_key": "key-two"})
+        assert oauth.get_api_key() == "key-two"
+
+    def test_unchanged_file_is_not_reparsed(self, home, monkeypatch):
+        oauth = ClaudeOAuth()
+        oauth.save_api_key("key-one")
+        assert oauth.get_api_key() == "key-one"
+
+        def fail(*args, **kwargs):
+            raise AssertionError("credentials.json parsed again")
+
+        monkeypatch.setattr("codesm.auth.credentials.fastjson.loads", fail)
+        assert oauth.get_api_key() == "key-one"
+        assert not oauth.is_token_expired()
+
+    def test_legacy_millisecond_expiry(self, home):
+        oauth = ClaudeOAuth()
+        write_credentials(home, {
+            "auth_type": "oauth",
+            "access_token": "token",
+            "expires_at": int((time.time() + 3600) * 1000),
+        })
+        assert not oauth.is_token_expired()
+
+        write_credentials(home, {
+            "auth_type": "oauth",
+            "access_token": "token",
+            "expires_at": int((time.time() - 60) * 1000),
+        })
+        assert oauth.is_token_expired()
@@ -0,0 +1,111 @@
+"""Tests for format on save"""
+
+import sys
+import textwrap
+
+import pytest
+
+from codesm import formatter as formatter_module
+from codesm.formatter import Formatter, FormatterType
+
+FAKE_FORMATTER = textwrap.dedent('''
+    import sys
+    from pathlib import Path
+
+    files = [Path(a) for a in sys.argv[1:]]
+    with open(sys.argv[0] + ".log", "a") as log:
+        log.write(" ".join(f.name for f in files) + "\\n")
+    if any("BROKEN" in f.read_text() for f in files):
+        print("cannot parse", file=sys.stderr)
+        sys.exit(1)
+    for f in files:
+        text = f.read_text()
+        formatted = "\\n".join(line.rstrip() for line in text.split("\\n"))
+        # Like real formatters, leave already-formatted files untouched
+        if formatted != text:
+            f.write_text(formatted)
+''')
+
+
+@pytest.fixture
+def fake_black(tmp_path, monkeypatch):
+    """Route .py formatting to a script that strips trailing whitespace"""
+    script = tmp_path / "fake_black.py"
+    script.write_text(FAKE_FORMATTER)
+    monkeypatch.setitem(formatter_module.FORMATTER_COMMANDS, FormatterType.BLACK, {
+        "cmd": [sys.executable, str(script), "{file}"],
+    })
+    fmt = Formatter()
+    fmt._available_formatters = {FormatterType.RUFF: False, FormatterType.BLACK: True}
+    return fmt, script.with_name(script.name + ".log")
+
+
+class TestFormatterAvailability:
+    async def test_found_on_path_without_running_it(self, tmp_path, monkeypatch):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "ruff").write_text("#!/bin/sh\nexit 1\n")
+        monkeypatch.setenv("PATH", str(bin_dir))
+
+        fmt = Formatter()
+        assert await fmt.find_available_formatter(tmp_path / "mod.py") == FormatterType.RUFF
+        assert await fmt.find_available_formatter(tmp_path / "main.go") is None
+
+
+class TestFormatFiles:
+    async def test_one_process_per_formatter(self, tmp_path, fake_black):
+        fmt, log = fake_black
+        dirty = tmp_path / "a" / "dirty.py"
+        dirty.parent.mkdir()
+        dirty.write_text("x = 1   \n")
+        clean = tmp_path / "clean.py"
+        clean.write_text("y = 2\n")
+        other = tmp_path / "notes.unknownext"
+        other.write_text("z")
+
+        results = await fmt.format_files([dirty, clean, other])
+
+        assert log.read_text().splitlines() == ["dirty.py clean.py"]
+        assert dirty.read_text() == "x = 1\n"
+        assert results[dirty].formatted and results[dirty].formatter == "black"
+        assert results[clean].success and not results[clean].formatted
+        assert results[other].success and results[other].formatter is None
+
+    async def test_each_formatter_runs_its_own_batch(self, tmp_path, fake_black, monkeypatch):
+        fmt, log = fake_black
+        script = tmp_path / "fake_shfmt.py"
+        script.write_text(FAKE_FORMATTER)
+        monkeypatch.setitem(formatter_module.FORMATTER_COMMANDS, FormatterType.SHFMT, {
+            "cmd": [sys.executable, str(script), "{file}"],
+        })
+        fmt._available_formatters[FormatterType.SHFMT] = True
+        py = tmp_path / "mod.py"
+        py.write_text("x = 1  \n")
+        sh = tmp_path / "run.sh"
+        sh.write_text("echo hi  \n")
+
+        results = await fmt.format_files([py, sh])
+
+        assert results[py].formatter == "black" and results[py].formatted
+        assert results[sh].formatter == "shfmt" and results[sh].formatted
+        assert log.read_text().splitlines() == ["mod.py"]
+        assert script.with_name("fake_shfmt.py.log").read_text().splitlines() == ["run.sh"]
+
+    async def test_failed_batch_falls_back_per_file(self, tmp_path, fake_black):
+        fmt, log = fake_black
+        good = tmp_path / "good.py"
+        good.write_text("x = 1   \n")
+        bad = tmp_path / "bad.py"
+        bad.write_text("BROKEN   \n")
+
+        results = await fmt.format_files([good, bad])
+
+        assert log.read_text().splitlines() == ["good.py bad.py", "good.py", "bad.py"]
+        assert results[good].success and results[good].formatted
+        assert not results[bad].success and "cannot parse" in results[bad].error
+
+    async def test_missing_file(self, tmp_path, fake_black):
+        fmt, _ = fake_black
+        missing = tmp_path / "missing.py"
+        results = await fmt.format_files([missing])
+        assert results[missing].error == "File not found"
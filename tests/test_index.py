@@ -0,0 +1,322 @@
+"""Tests for the codebase index"""
+
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import codesm.index.index_store as index_store
+import codesm.index.indexer as indexer
+from codesm.index import chunking, watcher
+from codesm.index.chunking import extract_chunks, get_code_files
+from codesm.index.indexer import ProjectIndexer
+
+
+async def fake_embeddings(texts: list[str]) -> list[list[float]]:
+    """Deterministic 16-dim embeddings derived from the text"""
+    out = []
+    for text in texts:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        out.append(np.random.default_rng(seed).standard_normal(16).tolist())
+    return out
+
+
+def content_of(chunks: list[dict], path: Path) -> str:
+    """Indexed text of the (single) chunk for a file, to search for it exactly"""
+    return next(c["content"] for c in chunks if c["file"] == str(path))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A small project with embeddings and the index cache redirected"""
+    monkeypatch.setattr(indexer, "get_embeddings", fake_embeddings)
+    monkeypatch.setattr(index_store, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(indexer, "_query_cache", {})
+
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "math_utils.py").write_text(
+        "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+    )
+    (root / "greet.py").write_text("def greet(name):\n    return f'hello {name}'\n")
+    return root
+
+
+class TestGetCodeFiles:
+    def test_prunes_hidden_and_skipped_dirs(self, tmp_path):
+        for rel in [
+            "app.py",
+            "src/lib/util.ts",
+            "README.md",
+            "node_modules/pkg/index.js",
+            ".git/hooks/pre-commit.sh",
+            "src/__pycache__/util.py",
+            ".hidden.py",
+        ]:
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x = 1\n")
+
+        files = {p.relative_to(tmp_path).as_posix() for p in get_code_files(tmp_path)}
+        assert files == {"app.py", "src/lib/util.ts"}
+
+        md = get_code_files(tmp_path, pattern="*.md")
+        assert md == [tmp_path / "README.md"]
+
+
+SAMPLE_PY = '''import os
+
+TEMPLATE = "class Foo: not a definition"
+
+
+@decorator
+def first(a, b):
+    return a + b
+
+
+class Second:
+    def method(self):
+        return "def inside a string"
+'''
+
+
+class TestExtractChunks:
+    def test_heuristic_splits_on_definitions(self):
+        chunks = chunking._extract_chunks_heuristic(Path("sample.py"), SAMPLE_PY)
+        assert chunks[0]["start_line"] == 7
+        assert chunks[0]["content"].startswith("def first(a, b):")
+        assert "import os" not in chunks[0]["content"]
+
+    def test_tree_sitter_definitions(self):
+        pytest.importorskip("tree_sitter_language_pack")
+        chunks = extract_chunks(Path("sample.py"), SAMPLE_PY)
+        assert [(c["start_line"], c["end_line"]) for c in chunks] == [(6, 8), (11, 13)]
+        assert chunks[0]["content"].startswith("@decorator\ndef first")
+
+    def test_window_fallback_without_definitions(self):
+        content = "\n".join(f"echo line {i}" for i in range(80))
+        chunks = extract_chunks(Path("script.txt"), content)
+        assert [(c["start_line"], c["end_line"]) for c in chunks] == [(1, 50), (31, 80), (61, 80)]
+
+
+class TestEmbedChunks:
+    async def test_rows_follow_chunk_order(self, monkeypatch):
+        monkeypatch.setattr(indexer, "get_embeddings", fake_embeddings)
+        monkeypatch.setattr(indexer, "EMBED_BATCH", 3)
+        chunks = [{"content": f"chunk {i}"} for i in range(10)]
+
+        matrix = await indexer._embed_chunks(chunks)
+
+        expected = np.array(await fake_embeddings([c["content"] for c in chunks]))
+        expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+        assert matrix.shape == (10, 16)
+        assert matrix.dtype == np.float32
+        np.testing.assert_allclose(matrix, expected, rtol=1e-5)
+
+    async def test_failed_batch_propagates(self, monkeypatch):
+        async def failing(texts):
+            raise RuntimeError("embedding service down")
+
+        monkeypatch.setattr(indexer, "get_embeddings", failing)
+        with pytest.raises(ExceptionGroup):
+            await indexer._embed_chunks([{"content": "x"}])
+
+
+class TestQueryCache:
+    async def test_repeated_query_is_embedded_once(self, monkeypatch):
+        calls = []
+
+        async def counting(texts):
+            calls.append(texts)
+            return await fake_embeddings(texts)
+
+        monkeypatch.setattr(indexer, "get_embeddings", counting)
+        monkeypatch.setattr(indexer, "_query_cache", {})
+
+        first = await indexer._embed_query("find the parser")
+        second = await indexer._embed_query("find the parser")
+        assert second is first
+        assert len(calls) == 1
+        assert np.linalg.norm(first) == pytest.approx(1.0)
+
+    async def test_evicts_least_recently_used(self, monkeypatch):
+        monkeypatch.setattr(indexer, "get_embeddings", fake_embeddings)
+        monkeypatch.setattr(indexer, "_query_cache", {})
+        monkeypatch.setattr(indexer, "QUERY_CACHE_SIZE", 2)
+
+        await indexer._embed_query("a")
+        await indexer._embed_query("b")
+        await indexer._embed_query("a")
+        await indexer._embed_query("c")
+        assert list(indexer._query_cache) == ["a", "c"]
+
+
+class TestQuantization:
+    def test_round_trip_preserves_ranking(self):
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((200, 64)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        query = embeddings[7]
+
+        quantized, scales = index_store._quantize(embeddings)
+        restored = index_store._dequantize(quantized, scales)
+
+        assert quantized.dtype == np.int8
+        assert np.abs(restored @ query - embeddings @ query).max() < 2e-2
+        assert np.argmax(restored @ query) == 7
+
+    def test_zero_row(self):
+        quantized, scales = index_store._quantize(np.zeros((1, 4), dtype=np.float32))
+        assert not quantized.any()
+        assert scales[0] == 1
+
+
+class TestProjectIndexer:
+    async def test_build_and_search(self, project):
+        ix = ProjectIndexer(project)
+        chunks = await ix.ensure_index(force=True)
+        assert {c["file"] for c in chunks} == {
+            str(project / "math_utils.py"),
+            str(project / "greet.py"),
+        }
+
+        query = content_of(chunks, project / "greet.py")
+        results = await ix.search(query, top_k=1)
+        assert results[0]["file"] == str(project / "greet.py")
+        assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+    async def test_incremental_update(self, project):
+        await ProjectIndexer(project).ensure_index(force=True)
+
+        (project / "greet.py").unlink()
+        (project / "new_module.py").write_text("def fresh():\n    return 42\n")
+
+        chunks = await ProjectIndexer(project).update_incremental()
+        files = {c["file"] for c in chunks}
+        assert str(project / "greet.py") not in files
+        assert str(project / "new_module.py") in files
+
+        query = content_of(chunks, project / "new_module.py")
+        results = await ProjectIndexer(project).search(query, top_k=1)
+        assert results[0]["file"] == str(project / "new_module.py")
+
+    async def test_reload_from_cache(self, project):
+        built = ProjectIndexer(project)
+        await built.ensure_index(force=True)
+
+        reloaded = ProjectIndexer(project)
+        chunks = await reloaded.ensure_index()
+        assert chunks == built._chunks
+        assert all("embedding" not in c for c in chunks)
+        # Stored int8-quantized on disk, searched as float32
+        assert reloaded._embeddings.dtype == np.float32
+        assert reloaded._embeddings.flags["C_CONTIGUOUS"]
+        np.testing.assert_allclose(reloaded._embeddings, built._embeddings, atol=2e-2)
+
+    async def test_search_ranks_by_score(self, project):
+        ix = ProjectIndexer(project)
+        chunks = await ix.ensure_index(force=True)
+
+        results = await ix.search("def add(a, b)", top_k=10)
+        scores = [r["score"] for r in results]
+        assert len(results) == len(chunks)
+        assert scores == sorted(scores, reverse=True)
+        assert len(await ix.search("def add(a, b)", top_k=1)) == 1
+
+    async def test_hnsw_search(self, project, monkeypatch):
+        pytest.importorskip("faiss")
+        monkeypatch.setattr(indexer, "ANN_MIN_CHUNKS", 1)
+
+        ix = ProjectIndexer(project)
+        chunks = await ix.ensure_index(force=True)
+        assert ix._ann is not None
+
+        query = content_of(chunks, project / "greet.py")
+        results = await ProjectIndexer(project).search(query, top_k=1)
+        assert results[0]["file"] == str(project / "greet.py")
+
+    async def test_touch_without_edit_is_not_reindexed(self, project, monkeypatch):
+        await ProjectIndexer(project).ensure_index(force=True)
+
+        embedded = []
+
+        async def counting(texts):
+            embedded.extend(texts)
+            return await fake_embeddings(texts)
+
+        monkeypatch.setattr(indexer, "get_embeddings", counting)
+        greet = project / "greet.py"
+        stat = greet.stat()
+        os.utime(greet, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+        await ProjectIndexer(project).update_incremental()
+        assert embedded == []
+        meta = index_store.IndexStore.load_meta(ProjectIndexer(project).project_id)
+        assert meta["file_state"][str(greet)]["mtime"] == greet.stat().st_mtime
+
+        greet.write_text("def greet(name):\n    return f'hi {name}'\n")
+        await ProjectIndexer(project).update_incremental()
+        assert embedded and all("hi {name}" in t for t in embedded)
+
+    async def test_update_files_checks_only_given_paths(self, project):
+        await ProjectIndexer(project).ensure_index(force=True)
+
+        (project / "greet.py").unlink()
+        (project / "math_utils.py").write_text("def mul(a, b):\n    return a * b\n")
+        new = project / "new_module.py"
+        new.write_text("def fresh():\n    return 42\n")
+
+        chunks = await ProjectIndexer(project).update_files(
+            [project / "greet.py", new, project / "notes.md"]
+        )
+        files = {c["file"] for c in chunks}
+        assert files == {str(project / "math_utils.py"), str(new)}
+        # Not among the given paths, so still the old contents
+        assert "return a + b" in content_of(chunks, project / "math_utils.py")
+
+    async def test_update_after_every_file_was_deleted(self, project):
+        ix = ProjectIndexer(project)
+        await ix.ensure_index(force=True)
+        (project / "greet.py").unlink()
+        (project / "math_utils.py").unlink()
+        assert await ix.update_files([project / "greet.py", project / "math_utils.py"]) == []
+
+        new = project / "new_module.py"
+        new.write_text("def fresh():\n    return 42\n")
+        chunks = await ix.update_files([new])
+        assert {c["file"] for c in chunks} == {str(new)}
+        results = await ix.search(content_of(chunks, new), top_k=1)
+        assert results[0]["file"] == str(new)
+
+
+class TestIndexWatcher:
+    async def test_reindexes_on_file_events(self, project, monkeypatch):
+        pytest.importorskip("watchdog")
+        await ProjectIndexer(project).ensure_index(force=True)
+        updated = asyncio.Event()
+        seen = []
+        update_files = ProjectIndexer.update_files
+
+        async def recording(self, paths):
+            seen.extend(paths)
+            result = await update_files(self, paths)
+            updated.set()
+            return result
+
+        monkeypatch.setattr(ProjectIndexer, "update_files", recording)
+        w = watcher.IndexWatcher()
+        w.start(project)
+        try:
+            await asyncio.sleep(0.2)
+            new = project / "new_module.py"
+            new.write_text("def fresh():\n    return 42\n")
+            await asyncio.wait_for(updated.wait(), timeout=5)
+        finally:
+            await w.astop()
+
+        assert new in seen
+        meta = index_store.IndexStore.load_meta(ProjectIndexer(project).project_id)
+        assert str(new) in meta["file_state"]
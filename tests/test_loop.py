@@ -0,0 +1,147 @@
+"""Tests for the ReAct loop"""
+
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+from codesm.agent.loop import ReActLoop
+from codesm.provider.base import StreamChunk
+
+
+class StallingProvider:
+    """Streams two quick text chunks, then stalls before finishing the text"""
+
+    def __init__(self, stall: float):
+        self.stall = stall
+
+    async def stream(self, system, messages, tools):
+        yield StreamChunk(type="text", content="Let me ")
+        yield StreamChunk(type="text", content="edit the file")
+        await asyncio.sleep(self.stall)
+        yield StreamChunk(type="text", content=".")
+
+
+class TestTextCoalescing:
+    async def test_pending_text_flushed_during_stall(self):
+        loop = ReActLoop(text_flush_interval=0.05)
+        clock = asyncio.get_running_loop().time
+        start = clock()
+        received = []
+
+        async for chunk in loop.execute(
+            provider=StallingProvider(stall=1.0),
+            system_prompt="",
+            messages=[{"role": "user", "content": "hi"}],
+            tools=SimpleNamespace(get_schemas=lambda: []),
+            context={},
+        ):
+            received.append((clock() - start, chunk.content))
+
+        assert "".join(text for _, text in received) == "Let me edit the file."
+        shown_before_stall_ended = "".join(text for at, text in received if at < 0.5)
+        assert shown_before_stall_ended == "Let me edit the file"
+
+
+class EndlessProvider:
+    """Streams text until closed, recording when its cleanup runs"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def stream(self, system, messages, tools):
+        try:
+            while True:
+                yield StreamChunk(type="text", content="x")
+        finally:
+            self.closed = True
+
+
+class TestReadAhead:
+    async def test_stopping_early_closes_provider_stream(self):
+        provider = EndlessProvider()
+        turn = ReActLoop().execute(
+            provider=provider,
+            system_prompt="",
+            messages=[{"role": "user", "content": "hi"}],
+            tools=SimpleNamespace(get_schemas=lambda: []),
+            context={},
+        )
+        async with contextlib.aclosing(turn):
+            async for _ in turn:
+                # Let the read-ahead fill its queue so the pump is blocked
+                await asyncio.sleep(0.05)
+                break
+
+        assert provider.closed
+
+
+class ScriptedProvider:
+    """Answers each request with the next scripted list of chunks"""
+
+    def __init__(self, turns: list[list[StreamChunk]]):
+        self.turns = turns
+        self.calls = 0
+
+    async def stream(self, system, messages, tools):
+        self.calls += 1
+        for chunk in self.turns[self.calls - 1]:
+            yield chunk
+
+
+def tool_call(call_id: str, path: str) -> list[StreamChunk]:
+    return [StreamChunk(type="tool_call", id=call_id, name="read", args={"path": path})]
+
+
+class RecordingTools:
+    def __init__(self):
+        self.executed = []
+
+    def get_schemas(self):
+        return []
+
+    async def execute_parallel(self, calls, context):
+        self.executed.extend(calls)
+        return [(call_id, name, "contents") for call_id, name, _ in calls]
+
+
+async def run_turn(provider, tools) -> list[StreamChunk]:
+    chunks = []
+    async for chunk in ReActLoop().execute(
+        provider=provider,
+        system_prompt="",
+        messages=[{"role": "user", "content": "hi"}],
+        tools=tools,
+        context={},
+    ):
+        chunks.append(StreamChunk(type=chunk.type, content=chunk.content))
+    return chunks
+
+
+class TestRepeatedToolCalls:
+    async def test_identical_calls_stop_the_loop(self):
+        provider = ScriptedProvider([
+            tool_call("call_1", "a.py"),
+            tool_call("call_2", "a.py"),
+            [StreamChunk(type="text", content="never requested")],
+        ])
+        tools = RecordingTools()
+
+        chunks = await run_turn(provider, tools)
+
+        assert provider.calls == 2
+        assert [call_id for call_id, _, _ in tools.executed] == ["call_1"]
+        assert chunks[-1].content == "\n\n[Detected repeated tool-call loop - stopping]"
+
+    async def test_different_args_keep_going(self):
+        provider = ScriptedProvider([
+            tool_call("call_1", "a.py"),
+            tool_call("call_2", "b.py"),
+            [StreamChunk(type="text", content="Done.")],
+        ])
+        tools = RecordingTools()
+
+        chunks = await run_turn(provider, tools)
+
+        assert provider.calls == 3
+        assert [call_id for call_id, _, _ in tools.executed] == ["call_1", "call_2"]
+        assert chunks[-1].content == "Done."
@@ -0,0 +1,426 @@
+"""Tests for the LSP client module"""
+
+import asyncio
+import json
+import shutil
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from codesm import lsp
+
+FAKE_SERVER = textwrap.dedent('''
+    import json
+    import sys
+    import time
+
+    def read():
+        length = None
+        while True:
+            line = sys.stdin.buffer.readline()
+            if not line:
+                sys.exit(0)
+            if line == b"\\r\\n":
+                break
+            name, value = line.decode().split(":", 1)
+            if name.lower() == "content-length":
+                length = int(value)
+        return json.loads(sys.stdin.buffer.read(length))
+
+    def send(message):
+        body = json.dumps(message).encode()
+        sys.stdout.buffer.write(b"Content-Length: %d\\r\\n\\r\\n" % len(body) + body)
+        sys.stdout.buffer.flush()
+
+    while True:
+        message = read()
+        method = message.get("method")
+        params = message.get("params") or {}
+        with open(sys.argv[0] + ".log", "a") as log:
+            log.write(f"{method}\\n")
+        if method == "exit":
+            break
+        if method in ("textDocument/didOpen", "textDocument/didChange"):
+            doc = params["textDocument"]
+            text = doc["text"] if "text" in doc else params["contentChanges"][-1]["text"]
+            diagnostics = [
+                {
+                    "range": {"start": {"line": i, "character": line.index("TODO")}},
+                    "message": "TODO left in code",
+                    "severity": 2,
+                    "source": "fake",
+                }
+                for i, line in enumerate(text.split("\\n"))
+                if "TODO" in line
+            ]
+            send({
+                "jsonrpc": "2.0",
+                "method": "textDocument/publishDiagnostics",
+                "params": {"uri": doc["uri"], "diagnostics": diagnostics},
+            })
+        elif method == "textDocument/definition":
+            time.sleep(0.3)
+            send({"jsonrpc": "2.0", "id": message["id"], "result": {
+                "uri": params["textDocument"]["uri"],
+                "range": {"start": {"line": 0, "character": 0}, "end": {"line": 0, "character": 1}},
+            }})
+        elif "id" in message:
+            result = {"capabilities": {}} if method == "initialize" else None
+            send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+''')
+
+
+@pytest.fixture(autouse=True)
+def fresh_which():
+    """Don't let memoized executable lookups leak between tests"""
+    lsp._which.cache_clear()
+    yield
+    lsp._which.cache_clear()
+
+
+async def start_fake_servers(tmp_path, monkeypatch, keys: list[str]):
+    """Serve .py files from scripted language servers; returns the workspace"""
+    script = tmp_path / "fake_server.py"
+    script.write_text(FAKE_SERVER)
+    for key in keys:
+        monkeypatch.setitem(lsp.SERVERS, key, lsp.ServerConfig(
+            name=f"fake-{key}",
+            command=[sys.executable, str(script)],
+            file_extensions=[".py"],
+        ))
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    assert await lsp.init(str(workspace), servers=keys) == dict.fromkeys(keys, True)
+    return workspace
+
+
+@pytest.fixture
+async def fake_server(tmp_path, monkeypatch):
+    yield await start_fake_servers(tmp_path, monkeypatch, ["python"])
+    await lsp.shutdown()
+
+
+@pytest.fixture
+async def two_fake_servers(tmp_path, monkeypatch):
+    """Both .py servers running, as when pylsp and pyright are configured"""
+    monkeypatch.setattr(lsp, "_CONFLICT_GROUPS", [])
+    yield await start_fake_servers(tmp_path, monkeypatch, ["python", "python-pyright"])
+    await lsp.shutdown()
+
+
+class TestDetectExtensions:
+    def test_single_walk_skips_vendored_dirs(self, tmp_path):
+        for rel in [
+            "app/main.py",
+            "web/index.ts",
+            "config.yml",
+            "README.md",
+            "node_modules/pkg/index.js",
+            ".venv/lib/site.py",
+            "target/debug/build.rs",
+        ]:
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+
+        assert lsp._detect_extensions(str(tmp_path)) == {".py", ".ts", ".yml"}
+
+    def test_missing_root(self, tmp_path):
+        assert lsp._detect_extensions(str(tmp_path / "missing")) == set()
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+    async def test_git_listing_honours_gitignore(self, tmp_path):
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        (tmp_path / ".gitignore").write_text("generated/\n")
+        for rel in ["src/app.py", "scripts/run.sh", "generated/api.go"]:
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+
+        assert await lsp._git_extensions(str(tmp_path)) == {".py", ".sh"}
+
+    async def test_git_listing_outside_repo(self, tmp_path):
+        assert await lsp._git_extensions(str(tmp_path)) is None
+
+
+class TestInit:
+    async def test_executable_lookups_cached_until_shutdown(self, tmp_path, monkeypatch):
+        lookups = []
+
+        def which(name):
+            lookups.append(name)
+            return None
+
+        monkeypatch.setattr(lsp.shutil, "which", which)
+
+        assert await lsp.init(str(tmp_path), servers=["python"]) == {"python": False}
+        assert await lsp.init(str(tmp_path), servers=["python"]) == {"python": False}
+        assert lookups == ["pylsp"]
+
+        await lsp.shutdown()
+        await lsp.init(str(tmp_path), servers=["python"])
+        assert lookups == ["pylsp", "pylsp"]
+
+        lsp.refresh_available_servers()
+        await lsp.init(str(tmp_path), servers=["python"])
+        assert lookups == ["pylsp", "pylsp", "pylsp"]
+
+    async def test_autodetect_picks_first_available_server(self, tmp_path, monkeypatch):
+        for name in ["main.py", "lib.c", "util.cpp", "style.scss", "notes.md"]:
+            (tmp_path / name).write_text("")
+        on_path = {"pyright-langserver", "clangd", "vscode-css-language-server"}
+        monkeypatch.setattr(lsp.shutil, "which", lambda name: name if name in on_path else None)
+        # Nothing actually starts: the fake executables don't exist
+        monkeypatch.setattr(lsp.LSPClient, "start", lambda self: asyncio.sleep(0, False))
+
+        results = await lsp.init(str(tmp_path))
+        assert list(results) == ["python-pyright", "clangd", "css"]
+
+
+    async def test_alternative_servers_started_once(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(lsp.shutil, "which", lambda name: name)
+        monkeypatch.setattr(lsp.LSPClient, "start", lambda self: asyncio.sleep(0, False))
+
+        results = await lsp.init(str(tmp_path), servers=["python-pyright", "rust", "python", "rust"])
+        assert list(results) == ["python-pyright", "rust"]
+
+
+class TestServerLookup:
+    def test_servers_for_file_by_priority(self):
+        assert lsp.get_servers_for_file("/src/app.tsx") == ["typescript", "eslint"]
+        assert lsp.get_servers_for_file("/src/mod.py") == ["python", "python-pyright"]
+        assert lsp.get_servers_for_file("/src/Makefile") == []
+        assert lsp.get_server_for_file("/src/lib.rs") == "rust"
+
+    def test_language_id(self, tmp_path):
+        client = lsp.LSPClient(config=lsp.SERVERS["vue"], root_path=str(tmp_path))
+        assert client._get_language_id("/src/App.vue") == "vue"
+        assert client._get_language_id("/src/types.d.ts") == "typescript"
+        assert client._get_language_id("/src/notes") == "plaintext"
+
+
+class TestPathToUri:
+    def test_relative_and_absolute_paths_memoized(self, tmp_path):
+        client = lsp.LSPClient(config=lsp.SERVERS["python"], root_path=str(tmp_path))
+        expected = (tmp_path / "pkg" / "my mod.py").resolve().as_uri()
+
+        assert client._path_to_uri("pkg/my mod.py") == expected
+        assert client._path_to_uri(str(tmp_path / "pkg" / "my mod.py")) == expected
+        assert client._uri_cache["pkg/my mod.py"] == expected
+
+
+class TestDiagnostics:
+    def test_publish_parsing(self, tmp_path):
+        client = lsp.LSPClient(config=lsp.SERVERS["python"], root_path=str(tmp_path))
+        client._handle_diagnostics({
+            "uri": (tmp_path / "mod.py").as_uri(),
+            "diagnostics": [
+                {"range": {"start": {"line": 4, "character": 2}}, "message": "bad", "severity": 1},
+                {"range": None, "message": "no range", "source": "lint"},
+            ],
+        })
+
+        diags = client.get_diagnostics(str(tmp_path / "mod.py"))
+        assert [(d.line, d.column, d.severity, d.source) for d in diags] == [
+            (5, 3, "error", None),
+            (1, 1, "hint", "lint"),
+        ]
+
+    def test_flat_list_cached_until_next_publish(self, tmp_path):
+        client = lsp.LSPClient(config=lsp.SERVERS["python"], root_path=str(tmp_path))
+
+        def publish(name, count):
+            client._handle_diagnostics({
+                "uri": (tmp_path / name).as_uri(),
+                "diagnostics": [{"message": f"{name} {i}"} for i in range(count)],
+            })
+
+        publish("a.py", 2)
+        publish("b.py", 1)
+        first = client.get_diagnostics()
+        assert len(first) == 3
+        assert client.get_diagnostics() is first
+
+        publish("a.py", 0)
+        assert [d.message for d in client.get_diagnostics()] == ["b.py 0"]
+        assert client._diagnostics_count == 1
+
+    async def test_module_level_cache_tracks_publishes(self, fake_server):
+        source = fake_server / "mod.py"
+        source.write_text("# TODO\n")
+        await lsp.touch_file(str(source))
+
+        all_diags = lsp.diagnostics()
+        assert len(all_diags) == 1
+        assert lsp.status()["python"]["diagnostics_count"] == 1
+        assert lsp.diagnostics() is all_diags
+
+        client = lsp._clients["python"]
+        await client.did_change(str(source), "# TODO\n# TODO\n")
+        await client.wait_for_diagnostics(str(source), timeout=5.0)
+        assert len(lsp.diagnostics()) == 2
+
+
+    def test_publishes_outside_workspace_ignored(self, tmp_path):
+        workspace = tmp_path / "workspace"
+        workspace.mkdir()
+        client = lsp.LSPClient(config=lsp.SERVERS["python"], root_path=str(workspace))
+
+        for path in [workspace / "mod.py", tmp_path / "site-packages" / "dep.py"]:
+            client._handle_diagnostics({"uri": path.as_uri(), "diagnostics": [{"message": "x"}]})
+
+        assert [d.path for d in client.get_diagnostics()] == [str(workspace / "mod.py")]
+
+
+class TestTouchFile:
+    async def test_returns_once_diagnostics_arrive(self, fake_server):
+        source = fake_server / "mod.py"
+        source.write_text("x = 1\n# TODO: remove\n")
+
+        started = time.monotonic()
+        diags = await lsp.touch_file(str(source), timeout=5.0)
+
+        assert time.monotonic() - started < 1.0
+        assert [(d.line, d.column, d.severity) for d in diags] == [(2, 3, "warning")]
+
+    async def test_opened_file_outside_workspace(self, fake_server, tmp_path):
+        outside = tmp_path / "elsewhere.py"
+        outside.write_text("# TODO\n")
+
+        assert len(await lsp.touch_file(str(outside), timeout=5.0)) == 1
+
+    async def test_all_servers_notified(self, two_fake_servers):
+        source = two_fake_servers / "mod.py"
+        source.write_text("# TODO\n")
+
+        diags = await lsp.touch_file(str(source))
+        assert len(diags) == 2
+
+    async def test_non_ascii_text(self, fake_server):
+        source = fake_server / "mod.py"
+        source.write_text("name = 'café ☕'\n# TODO: naïve\n")
+
+        diags = await lsp.touch_file(str(source))
+        assert [d.line for d in diags] == [2]
+
+    async def test_file_read_once_for_all_servers(self, two_fake_servers, monkeypatch):
+        source = two_fake_servers / "mod.py"
+        source.write_text("x = 1\n")
+        reads = []
+        read_text = Path.read_text
+
+        def counting(self, *args, **kwargs):
+            reads.append(self.name)
+            return read_text(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "read_text", counting)
+        await lsp.touch_file(str(source))
+        await lsp.touch_file(str(source))
+        assert reads == ["mod.py"]
+
+
+class TestCodeIntelligence:
+    async def test_servers_queried_concurrently(self, two_fake_servers):
+        source = two_fake_servers / "mod.py"
+        source.write_text("x = 1\n")
+
+        started = time.monotonic()
+        locations = await lsp.goto_definition(str(source), 1, 1)
+
+        # Each fake server takes 0.3s to answer
+        assert time.monotonic() - started < 0.55
+        assert [loc.path for loc in locations] == [str(source), str(source)]
+
+
+class TestDidChange:
+    async def test_burst_of_edits_sends_one_change(self, fake_server, tmp_path):
+        source = fake_server / "mod.py"
+        source.write_text("x = 1\n")
+        await lsp.touch_file(str(source))
+        client = lsp._clients["python"]
+
+        for i in range(5):
+            await client.did_change(str(source), f"x = {i}\n" + "# TODO\n" * i)
+        assert await client.wait_for_diagnostics(str(source), timeout=5.0)
+
+        log = (tmp_path / "fake_server.py.log").read_text().splitlines()
+        assert log.count("textDocument/didChange") == 1
+        assert len(client.get_diagnostics(str(source))) == 4
+
+    async def test_request_flushes_pending_change(self, fake_server, tmp_path):
+        source = fake_server / "mod.py"
+        source.write_text("x = 1\n")
+        await lsp.touch_file(str(source))
+        client = lsp._clients["python"]
+
+        await client.did_change(str(source), "x = 2\n")
+        await client.definition(str(source), 1, 1)
+
+        log = (tmp_path / "fake_server.py.log").read_text().splitlines()
+        assert log.index("textDocument/didChange") < log.index("textDocument/definition")
+
+
+class TestWriter:
+    async def test_burst_written_in_one_batch(self, tmp_path):
+        batches = []
+
+        async def drain():
+            pass
+
+        client = lsp.LSPClient(config=lsp.SERVERS["python"], root_path=str(tmp_path))
+        client.process = SimpleNamespace(
+            stdin=SimpleNamespace(writelines=lambda frames: batches.append(frames), drain=drain)
+        )
+        client._writer_task = asyncio.create_task(client._write_messages())
+        try:
+            for i in range(3):
+                await client._notify("$/note", {"n": i})
+            await asyncio.sleep(0)
+            await client._notify("$/note", {"n": 3})
+            await asyncio.sleep(0)
+        finally:
+            client._writer_task.cancel()
+
+        # A header and a body buffer per message
+        assert [len(b) for b in batches] == [6, 2]
+        header, body = batches[0][4:6]
+        assert header == b"Content-Length: %d\r\n\r\n" % len(body)
+        assert json.loads(body)["params"] == {"n": 2}
+
+
+class TestReader:
+    async def test_split_and_large_messages(self, tmp_path):
+        client = lsp.LSPClient(config=lsp.SERVERS["python"], root_path=str(tmp_path))
+        stdout = asyncio.StreamReader()
+        client.process = SimpleNamespace(stdout=stdout)
+
+        def frame(message, extra_header=b""):
+            body = json.dumps(message).encode()
+            return b"Content-Length: %d\r\n%s\r\n" % (len(body), extra_header) + body
+
+        big = {
+            "jsonrpc": "2.0",
+            "method": "textDocument/publishDiagnostics",
+            "params": {
+                "uri": (tmp_path / "big.py").as_uri(),
+                "diagnostics": [{"message": "x" * 100} for _ in range(2000)],
+            },
+        }
+        small = {**big, "params": {"uri": (tmp_path / "small.py").as_uri(), "diagnostics": [{}]}}
+        data = frame(small, b"Content-Type: application/vscode-jsonrpc\r\n") + frame(big)
+
+        reader = asyncio.create_task(client._read_messages())
+        # Arrives in pieces, splitting headers and bodies
+        for i in range(0, len(data), 7000):
+            stdout.feed_data(data[i:i + 7000])
+            await asyncio.sleep(0)
+        stdout.feed_eof()
+        await reader
+
+        assert len(client.get_diagnostics(str(tmp_path / "small.py"))) == 1
+        assert len(client.get_diagnostics(str(tmp_path / "big.py"))) == 2000
@@ -9,7 +9,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from codesm.mcp.client import MCPClient, MCPServerConfig, MCPTool as MCPToolInfo
 from codesm.mcp.manager import MCPManager
 from codesm.mcp.tool import MCPTool, MCPResourceTool
-from codesm.mcp.config import load_mcp_config, _parse_mcp_config
+from codesm.mcp import config as mcp_config
+from codesm.mcp.config import find_mcp_config, load_mcp_config, _parse_mcp_config
 
 
 def run_async(coro):
@@ -100,6 +101,31 @@ class TestMCPConfigParsing:
         assert "invalid" not in servers
 
 
+class TestFindMCPConfig:
+    @pytest.fixture(autouse=True)
+    def fresh_lookup(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        mcp_config._find_project_config.cache_clear()
+        yield
+        mcp_config._find_project_config.cache_clear()
+
+    def test_candidates_in_order(self, tmp_path):
+        (tmp_path / ".mcp").mkdir()
+        (tmp_path / ".mcp" / "servers.json").write_text("{}")
+        (tmp_path / "codesm.json").write_text("{}")
+        assert find_mcp_config(tmp_path) == tmp_path / ".mcp" / "servers.json"
+
+    def test_user_config_only_as_fallback(self, tmp_path):
+        user_config = tmp_path / "home" / ".config" / "codesm" / "mcp.json"
+        user_config.parent.mkdir(parents=True)
+        user_config.write_text("{}")
+        project = tmp_path / "project"
+        project.mkdir()
+
+        assert find_mcp_config(project) is None
+        assert find_mcp_config(project, user_fallback=True) == user_config
+
+
 class TestMCPTool:
     def test_tool_wrapper(self):
         mcp_tool_info = MCPToolInfo(
@@ -196,3 +222,46 @@ class TestMCPManager:
         manager = MCPManager()
         tools = manager.get_tools()
         assert tools == []
+
+    def test_connect_all_is_concurrent(self):
+        manager = MCPManager()
+        for name in ("a", "b", "c"):
+            manager.add_server(MCPServerConfig(name=name, command="echo"))
+        
+        running = 0
+        peak = 0
+        
+        async def fake_connect(self):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return self.config.name != "b"
+        
+        with patch.object(MCPClient, "connect", fake_connect):
+            results = run_async(manager.connect_all())
+        
+        assert {name: r.success for name, r in results.items()} == {"a": True, "b": False, "c": True}
+        assert list(results) == ["a", "b", "c"]
+        assert peak == 3
+        assert [s["name"] for s in manager.list_servers() if s["connected"]] == ["a", "c"]
+
+    def test_connect_all_reports_counts(self):
+        manager = MCPManager()
+        manager.add_server(MCPServerConfig(name="fs", command="echo"))
+        manager.add_server(MCPServerConfig(name="down", command="echo"))
+        
+        async def fake_connect(self):
+            if self.config.name == "down":
+                return False
+            self._tools = [MCPToolInfo("read", "Read", {}, "fs"), MCPToolInfo("write", "Write", {}, "fs")]
+            return True
+        
+        with patch.object(MCPClient, "connect", fake_connect):
+            results = run_async(manager.connect_all())
+            again = run_async(manager.connect_all())
+        
+        assert (results["fs"].success, results["fs"].n_tools, results["fs"].n_resources) == (True, 2, 0)
+        assert not results["down"]
+        assert again["fs"] == results["fs"]
@@ -67,6 +67,24 @@ class TestSession:
         assert messages[0]["role"] == "user"
         assert messages[1]["role"] == "assistant"
     
+    def test_get_messages_tracks_new_and_replaced_history(self, temp_dir):
+        from codesm.session.session import Session
+        
+        session = Session.create(temp_dir)
+        session.add_message(role="user", content="Hello")
+        assert len(session.get_messages()) == 1
+        
+        session.add_message(role="assistant", content="Hi", tool_calls=[{"id": "1"}])
+        session.add_message(role="assistant", content="Done")
+        messages = session.get_messages()
+        assert [m["content"] for m in messages] == ["Hello", "Done"]
+        
+        session.messages = session.messages[:1]
+        assert [m["content"] for m in session.get_messages()] == ["Hello"]
+        
+        session.clear()
+        assert session.get_messages() == []
+    
     def test_get_messages_for_display(self, temp_dir):
         from codesm.session.session import Session
         
@@ -81,6 +99,36 @@ class TestSession:
         assert display_messages[0]["role"] == "user"
         assert display_messages[1]["role"] == "assistant"
 
+    def test_older_snapshot_never_overwrites_newer(self, temp_dir):
+        from codesm.session.session import Session
+        from codesm.storage.storage import Storage
+        
+        session = Session(id="session_test", directory=temp_dir)
+        stale = session._save_data()
+        session.add_message(role="user", content="later")
+        
+        session._write(*stale)
+        data = Storage.read(["session", "session_test"])
+        assert [m["content"] for m in data["messages"]] == ["later"]
+        assert not any(p.name.endswith(".tmp") for p in Storage.BASE_DIR.rglob("*"))
+    
+    async def test_threaded_save_racing_a_loop_save(self, temp_dir):
+        import asyncio
+        from codesm.session.session import Session
+        from codesm.storage.storage import Storage
+        
+        session = Session(id="session_test", directory=temp_dir)
+        session.add_message(role="user", content="hello", persist=False)
+        pending = asyncio.create_task(session.save_async())
+        await asyncio.sleep(0)
+        session.title = "Renamed"
+        session.save()
+        await pending
+        
+        data = Storage.read(["session", "session_test"])
+        assert data["title"] == "Renamed"
+        assert [m["content"] for m in data["messages"]] == ["hello"]
+
 
 class TestMessage:
     def test_message_to_dict(self):
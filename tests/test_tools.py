@@ -153,6 +153,41 @@ class TestGlobTool:
         assert "file.txt" not in result
 
 
+class TestCodeSearchTool:
+    @pytest.mark.asyncio
+    async def test_pattern_search_uses_disk_cache(self, temp_dir, context, monkeypatch):
+        import numpy as np
+        from codesm.tool import codesearch
+        from codesm.tool.codesearch import CodeSearchTool
+
+        embedded = []
+
+        async def fake_embeddings(cls, texts):
+            embedded.extend(texts)
+            # One axis per keyword, so each query matches one chunk exactly
+            keywords = ["parse", "render", "store"]
+            return [[float(k in t) + 0.01 for k in keywords] for t in texts]
+
+        monkeypatch.setattr(codesearch, "CACHE_DIR", temp_dir / "cache")
+        monkeypatch.setattr(CodeSearchTool, "_get_embeddings", classmethod(fake_embeddings))
+        monkeypatch.setattr(CodeSearchTool, "_index_cache", {})
+        (temp_dir / "parser.py").write_text("def parse(text):\n    return text.split()\n")
+        (temp_dir / "view.py").write_text("def render(node):\n    return str(node)\n")
+
+        tool = CodeSearchTool()
+        results = await tool._search_with_pattern(temp_dir, "*.py", "render", top_k=1)
+        assert [Path(r["file"]).name for r in results] == ["view.py"]
+
+        # A fresh process reloads the matrix from disk instead of re-embedding
+        CodeSearchTool._index_cache.clear()
+        embedded.clear()
+        chunks, embeddings = await tool._build_index(temp_dir, "*.py")
+        assert embedded == []
+        assert embeddings.shape == (2, 3)
+        assert embeddings.dtype == np.float32 and embeddings.flags["C_CONTIGUOUS"]
+        assert all("embedding" not in c for c in chunks)
+
+
 class TestToolRegistry:
     def test_registry_loads_all_tools(self):
         from codesm.tool.registry import ToolRegistry
@@ -171,6 +206,18 @@ class TestToolRegistry:
         assert "webfetch" in tool_names
         assert "undo" in tool_names
     
+    def test_schemas_cached_until_tools_change(self):
+        from codesm.tool.registry import ToolRegistry
+        from codesm.tool.glob import GlobTool
+        
+        registry = ToolRegistry()
+        schemas = registry.get_schemas()
+        
+        assert registry.get_schemas() is schemas
+        
+        registry.register(GlobTool())
+        assert registry.get_schemas() is not schemas
+    
     @pytest.mark.asyncio
     async def test_execute_unknown_tool(self):
         from codesm.tool.registry import ToolRegistry